@@ -0,0 +1,149 @@
+"""
+Index factory for the FAISS backends we support behind `search()`.
+
+    flat      exact scan (IndexFlat), the recall baseline
+    ivf_flat  inverted lists over k-means cells, full vectors; tune `nprobe`
+    ivf_pq    inverted lists with product-quantised codes; tune `nprobe`
+    hnsw      graph search; tune `ef_search` (does not support removal)
+    sq_fp16   exact scan over float16 codes (half the memory of flat)
+    sq8       exact scan over 8-bit scalar-quantised codes (a quarter)
+
+Quantised kinds (sq_fp16, sq8, ivf_pq) trade recall for memory; `rerank`
+recovers most of it by re-scoring a few extra candidates against the
+full-precision vectors.
+
+Every index accepts `add_with_ids`, so it can sit behind `IndexStore`.
+
+Metrics: "l2" (Euclidean), "ip" (raw inner product) and "cosine", which is
+inner product over L2-normalised vectors. For "cosine" the vectors are
+normalised once when they enter the index (`prepare_vectors`), never on
+the search path.
+"""
+import faiss
+import numpy as np
+
+INDEX_KINDS = ("flat", "ivf_flat", "ivf_pq", "hnsw", "sq_fp16", "sq8")
+# FAISS cannot remove ids from these
+NO_REMOVE_KINDS = ("hnsw",)
+
+METRICS = {
+    "l2": faiss.METRIC_L2,
+    "ip": faiss.METRIC_INNER_PRODUCT,
+    "cosine": faiss.METRIC_INNER_PRODUCT,
+}
+
+DEFAULT_PARAMS = {
+    "nlist": 1024,   # IVF cells
+    "pq_m": 16,      # PQ sub-quantisers, must divide the dimension
+    "pq_nbits": 8,   # bits per PQ code
+    "hnsw_m": 32,    # HNSW neighbours per node
+    "ef_construction": 40,
+}
+
+
+def factory_string(kind, **params):
+    """FAISS index_factory description for `kind`"""
+    p = {**DEFAULT_PARAMS, **params}
+    if kind == "flat":
+        return "IDMap,Flat"
+    if kind == "ivf_flat":
+        return f"IVF{p['nlist']},Flat"
+    if kind == "ivf_pq":
+        return f"IVF{p['nlist']},PQ{p['pq_m']}x{p['pq_nbits']}"
+    if kind == "hnsw":
+        return f"IDMap,HNSW{p['hnsw_m']},Flat"
+    if kind == "sq_fp16":
+        return "IDMap,SQfp16"
+    if kind == "sq8":
+        return "IDMap,SQ8"
+    raise ValueError(f"Unknown index kind {kind!r}, expected one of {INDEX_KINDS}")
+
+
+def make_index(kind, d, metric="l2", **params):
+    """Create an empty (possibly untrained) index of the given kind"""
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}, expected one of {tuple(METRICS)}")
+    index = faiss.index_factory(d, factory_string(kind, **params), METRICS[metric])
+    if kind == "hnsw":
+        _hnsw(index).efConstruction = params.get("ef_construction", DEFAULT_PARAMS["ef_construction"])
+    return index
+
+
+def prepare_vectors(X, metric):
+    """float32, C-contiguous rows; L2-normalised in place for cosine"""
+    X = np.ascontiguousarray(X, dtype="float32")
+    if metric == "cosine":
+        faiss.normalize_L2(X)
+    return X
+
+
+def higher_is_better(metric):
+    """True if the index returns similarities rather than distances"""
+    return METRICS[metric] == faiss.METRIC_INNER_PRODUCT
+
+
+def _unwrap(index):
+    """Strip IndexIDMap (and similar) wrappers down to the real index"""
+    index = faiss.downcast_index(index)
+    while isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        index = faiss.downcast_index(index.index)
+    return index
+
+
+def _hnsw(index):
+    inner = _unwrap(index)
+    return inner.hnsw if hasattr(inner, "hnsw") else None
+
+
+def train_index(index, X, sample_size=100_000, seed=0):
+    """Train `index` on a random sample of the rows of X, if it needs training"""
+    if index.is_trained:
+        return index
+    X = np.ascontiguousarray(X, dtype="float32")
+    if len(X) > sample_size:
+        rows = np.random.default_rng(seed).choice(len(X), sample_size, replace=False)
+        X = X[np.sort(rows)]
+    index.train(X)
+    return index
+
+
+def rerank(Q, candidates, full_vectors, k, metric):
+    """Re-score candidate ids against full-precision vectors, keep the top k
+
+    Q is the prepared (n, d) query matrix, `candidates` the (n, k') ids from
+    a quantised index (-1 for missing) and `full_vectors` a float32 array or
+    memmap indexed by id. Returns (scores, ids) shaped like `index.search`.
+    """
+    valid = candidates >= 0
+    C = full_vectors[np.where(valid, candidates, 0)]  # (n, k', d)
+    scores = np.einsum("nd,nkd->nk", Q, C)
+    if higher_is_better(metric):
+        scores = np.where(valid, scores, -np.inf)
+        order = np.argsort(-scores, axis=1)[:, :k]
+    else:
+        # ||q - x||^2 = ||q||^2 - 2 q.x + ||x||^2
+        scores = (np.einsum("nd,nd->n", Q, Q)[:, None] - 2 * scores
+                  + np.einsum("nkd,nkd->nk", C, C))
+        scores = np.where(valid, scores, np.inf)
+        order = np.argsort(scores, axis=1)[:, :k]
+    return (np.take_along_axis(scores, order, axis=1).astype("float32"),
+            np.take_along_axis(np.where(valid, candidates, -1), order, axis=1))
+
+
+def set_search_params(index, nprobe=None, ef_search=None):
+    """Set query-time knobs; ignored by index kinds that do not use them"""
+    if nprobe is not None:
+        try:
+            faiss.extract_index_ivf(index).nprobe = nprobe
+        except RuntimeError:
+            pass  # not an IVF index
+    if ef_search is not None:
+        hnsw = _hnsw(index)
+        if hnsw is not None:
+            hnsw.efSearch = ef_search
+    return index
+
+
+def index_bytes(index):
+    """Serialized size of the index, a good proxy for its memory footprint"""
+    return int(faiss.serialize_index(index).nbytes)
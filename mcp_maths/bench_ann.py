@@ -0,0 +1,95 @@
+"""
+Recall / latency / memory benchmark for the ANN index backends.
+
+Uses synthetic clustered vectors, so it needs no Ollama:
+
+    python bench_ann.py --n 200000 --d 128 --k 10
+
+Recall@k is measured against the exact Flat index. Latency is per single
+query (p50/p99), which is what one `search()` call pays.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ann_index import index_bytes, make_index, prepare_vectors, set_search_params, train_index
+
+
+def synthetic_vectors(n, d, n_clusters=256, seed=0):
+    """Gaussian blobs, closer to real embeddings than uniform noise"""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((n_clusters, d)).astype("float32") * 4
+    labels = rng.integers(0, n_clusters, n)
+    return centres[labels] + rng.standard_normal((n, d)).astype("float32")
+
+
+def recall_at_k(found, truth):
+    k = truth.shape[1]
+    hits = sum(len(np.intersect1d(f[f >= 0], t)) for f, t in zip(found, truth))
+    return hits / (len(truth) * k)
+
+
+def time_queries(index, queries, k):
+    """Per-query latencies in milliseconds, plus the result ids"""
+    latencies = np.empty(len(queries))
+    found = np.empty((len(queries), k), dtype="int64")
+    for i, q in enumerate(queries):
+        start = time.perf_counter()
+        _, ids = index.search(q[None, :], k)
+        latencies[i] = (time.perf_counter() - start) * 1000
+        found[i] = ids[0]
+    return latencies, found
+
+
+def build(kind, X, train_size, metric="l2", **params):
+    index = make_index(kind, X.shape[1], metric, **params)
+    start = time.perf_counter()
+    train_index(index, X, sample_size=train_size)
+    index.add_with_ids(X, np.arange(len(X), dtype="int64"))
+    return index, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=200_000)
+    parser.add_argument("--d", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--metric", choices=["l2", "ip", "cosine"], default="l2")
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--pq-m", type=int, default=16)
+    parser.add_argument("--train-size", type=int, default=50_000)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 128])
+    args = parser.parse_args()
+
+    X = prepare_vectors(synthetic_vectors(args.n, args.d), args.metric)
+    queries = prepare_vectors(synthetic_vectors(args.queries, args.d, seed=1), args.metric)
+
+    flat, flat_build = build("flat", X, args.train_size, args.metric)
+    flat_lat, truth = time_queries(flat, queries, args.k)
+
+    rows = [("flat", "-", flat_build, 1.0, flat_lat, index_bytes(flat))]
+    for kind, knob, values in (("ivf_flat", "nprobe", args.nprobe),
+                               ("ivf_pq", "nprobe", args.nprobe),
+                               ("hnsw", "ef_search", args.ef_search)):
+        index, build_time = build(kind, X, args.train_size, args.metric,
+                                  nlist=args.nlist, pq_m=args.pq_m)
+        size = index_bytes(index)
+        for value in values:
+            set_search_params(index, **{knob: value})
+            lat, found = time_queries(index, queries, args.k)
+            rows.append((kind, f"{knob}={value}", build_time, recall_at_k(found, truth), lat, size))
+
+    print(f"n={args.n} d={args.d} metric={args.metric} queries={args.queries} k={args.k}\n")
+    print(f"{'index':<10}{'params':<15}{'build s':>9}{'recall@k':>10}"
+          f"{'p50 ms':>9}{'p99 ms':>9}{'MB':>9}{'B/vec':>8}")
+    for kind, params, build_time, recall, lat, size in rows:
+        print(f"{kind:<10}{params:<15}{build_time:>9.2f}{recall:>10.3f}"
+              f"{np.percentile(lat, 50):>9.3f}{np.percentile(lat, 99):>9.3f}"
+              f"{size / 2**20:>9.1f}{size / args.n:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
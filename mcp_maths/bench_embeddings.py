@@ -0,0 +1,113 @@
+"""
+Benchmark the batched embedding client against the original serial loop.
+
+Runs a local stub of Ollama's `/api/embeddings` and `/api/embed` endpoints
+with a fixed per-request latency, so no Ollama install is needed:
+
+    python bench_embeddings.py --texts 500 --latency 0.02
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+from embedding_client import OllamaEmbeddingClient
+
+
+def fake_embedding(text, dim):
+    """Deterministic pseudo-embedding for a text"""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    return np.random.default_rng(seed).standard_normal(dim).astype("float32").tolist()
+
+
+def make_stub_handler(dim, latency):
+    class StubOllamaHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like Ollama
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(latency)
+            if self.path == "/api/embeddings":
+                payload = {"embedding": fake_embedding(body["prompt"], dim)}
+            elif self.path == "/api/embed":
+                texts = body["input"]
+                if isinstance(texts, str):
+                    texts = [texts]
+                payload = {"model": body["model"],
+                           "embeddings": [fake_embedding(t, dim) for t in texts]}
+            else:
+                self.send_error(404)
+                return
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return StubOllamaHandler
+
+
+def start_stub_server(dim=3072, latency=0.02, port=0):
+    """Start the stub Ollama server in a daemon thread, return (server, base_url)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_stub_handler(dim, latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def serial_loop(texts, base_url, model="phi3"):
+    """The original script's loop: one fresh request per text"""
+    first = requests.post(f"{base_url}/api/embeddings", json={"model": model, "prompt": texts[0]})
+    d = len(first.json()["embedding"])
+    X = np.zeros(shape=(len(texts), d), dtype="float32")
+    X[0] = np.array(first.json()["embedding"], dtype="float32")
+    for i, text in enumerate(texts[1:], start=1):
+        res = requests.post(f"{base_url}/api/embeddings", json={"model": model, "prompt": text})
+        X[i] = np.array(res.json()["embedding"], dtype="float32")
+    return X
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--texts", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=3072)
+    parser.add_argument("--latency", type=float, default=0.02, help="stub seconds per request")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--in-flight", type=int, default=4)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(args.dim, args.latency)
+    texts = [f"Synthetic title number {i}" for i in range(args.texts)]
+
+    start = time.perf_counter()
+    X_serial = serial_loop(texts, base_url)
+    serial_time = time.perf_counter() - start
+
+    with OllamaEmbeddingClient(base_url=base_url, batch_size=args.batch_size,
+                               max_in_flight=args.in_flight, dim=args.dim) as client:
+        X_batched = np.zeros((len(texts), args.dim), dtype="float32")
+        start = time.perf_counter()
+        client.embed_into(texts, X_batched)
+        batched_time = time.perf_counter() - start
+        calls = client.calls
+
+    server.shutdown()
+    assert np.array_equal(X_serial, X_batched), "batched client returned different vectors"
+
+    print(f"Texts: {args.texts} | dim: {args.dim} | stub latency: {args.latency * 1000:.0f} ms")
+    print(f"Serial loop:    {serial_time:7.3f}s  {args.texts / serial_time:9.1f} texts/s  ({args.texts} requests)")
+    print(f"Batched client: {batched_time:7.3f}s  {args.texts / batched_time:9.1f} texts/s  ({calls} requests)")
+    print(f"Speedup: {serial_time / batched_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
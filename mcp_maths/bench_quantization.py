@@ -0,0 +1,80 @@
+"""
+Quantised vector storage benchmark: float32 vs float16 vs int8 (+ re-rank).
+
+Runs on synthetic clustered vectors, so it needs no Ollama:
+
+    python bench_quantization.py --n 200000 --d 768 --k 10
+
+For every storage mode it reports bytes per vector held by the index,
+recall@k against exact float32 search, single-query p50 latency and
+batched queries per second.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ann_index import index_bytes, make_index, prepare_vectors, rerank, train_index
+from bench_ann import recall_at_k, synthetic_vectors
+
+
+def run(index, Q, k, full_vectors=None, metric="l2", factor=4):
+    """Return (ids, p50 ms, queries/s) for one storage mode"""
+    def search(q):
+        if full_vectors is None:
+            return index.search(q, k)[1]
+        _, candidates = index.search(q, k * factor)
+        return rerank(q, candidates, full_vectors, k, metric)[1]
+
+    latencies = []
+    for q in Q[:200]:
+        start = time.perf_counter()
+        search(q[None, :])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    ids = search(Q)
+    qps = len(Q) / (time.perf_counter() - start)
+    return ids, float(np.percentile(latencies, 50)), qps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=200_000)
+    parser.add_argument("--d", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--metric", choices=["l2", "ip", "cosine"], default="cosine")
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    args = parser.parse_args()
+
+    X = prepare_vectors(synthetic_vectors(args.n, args.d), args.metric)
+    Q = prepare_vectors(synthetic_vectors(args.queries, args.d, seed=1), args.metric)
+    ids = np.arange(args.n, dtype="int64")
+
+    rows = []
+    truth = None
+    for kind in ("flat", "sq_fp16", "sq8"):
+        index = make_index(kind, args.d, args.metric)
+        train_index(index, X)
+        index.add_with_ids(X, ids)
+        per_vector = index_bytes(index) / args.n
+
+        found, p50, qps = run(index, Q, args.k)
+        if truth is None:
+            truth = found
+        rows.append((kind, per_vector, recall_at_k(found, truth), p50, qps))
+        if kind != "flat":
+            found, p50, qps = run(index, Q, args.k, X, args.metric, args.rerank_factor)
+            rows.append((f"{kind}+rerank", per_vector, recall_at_k(found, truth), p50, qps))
+
+    print(f"n={args.n} d={args.d} metric={args.metric} k={args.k} "
+          f"rerank factor={args.rerank_factor}\n")
+    print(f"{'storage':<16}{'B/vec':>8}{'recall@k':>10}{'loss':>8}{'p50 ms':>9}{'batch q/s':>11}")
+    for name, per_vector, recall, p50, qps in rows:
+        print(f"{name:<16}{per_vector:>8.0f}{recall:>10.3f}{1 - recall:>8.3f}{p50:>9.3f}{qps:>11.0f}")
+    print("\n+rerank keeps the float32 vectors on disk (memory-mapped), not in the index.")
+
+
+if __name__ == "__main__":
+    main()
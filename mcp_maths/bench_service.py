@@ -0,0 +1,108 @@
+"""
+Load test for search_service.py against a stub embedding server.
+
+Builds a synthetic index with the stub Ollama from bench_embeddings.py,
+starts the service with uvicorn in-process and fires concurrent requests:
+
+    python bench_service.py --docs 5000 --requests 2000 --concurrency 32
+"""
+import argparse
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+import uvicorn
+
+from bench_embeddings import start_stub_server
+from embedding_client import OllamaEmbeddingClient
+from index_store import IndexStore
+from ingest import ingest_texts
+
+
+def build_index(path, base_url, n_docs, dim):
+    store = IndexStore(path, metric="cosine")
+    with OllamaEmbeddingClient(base_url=base_url, batch_size=128, dim=dim) as client:
+        ingest_texts((f"Synthetic document {i}" for i in range(n_docs)), store, client)
+    store.save()
+
+
+def start_service(port):
+    import search_service
+
+    server = uvicorn.Server(uvicorn.Config(search_service.app, host="127.0.0.1", port=port,
+                                           log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def fire(url, n, concurrency, make_request):
+    """Send n requests with `concurrency` workers, return (wall s, latencies ms, server ms)"""
+    local = threading.local()
+
+    def one(i):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        res = make_request(local.session, url, i)
+        res.raise_for_status()
+        server_ms = float(re.search(r"total;dur=([\d.]+)", res.headers["Server-Timing"]).group(1))
+        return (time.perf_counter() - start) * 1000, server_ms
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(n)))
+    wall = time.perf_counter() - start
+    return wall, np.array([r[0] for r in results]), np.array([r[1] for r in results])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=16, help="queries per /search/batch call")
+    parser.add_argument("--latency", type=float, default=0.005, help="stub embedding latency (s)")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    stub, stub_url = start_stub_server(args.dim, args.latency)
+    workdir = tempfile.mkdtemp(prefix="bench_service_")
+    build_index(os.path.join(workdir, "index"), stub_url, args.docs, args.dim)
+
+    os.environ.update({
+        "OLLAMA_URL": stub_url,
+        "INDEX_DIR": os.path.join(workdir, "index"),
+        "CACHE_DIR": os.path.join(workdir, "cache"),
+    })
+    server = start_service(args.port)
+    base = f"http://127.0.0.1:{args.port}"
+
+    single = fire(f"{base}/search", args.requests, args.concurrency,
+                  lambda s, url, i: s.get(url, params={"q": f"query {i}", "k": 5}))
+    batch = fire(f"{base}/search/batch", args.requests // args.batch_size, args.concurrency,
+                 lambda s, url, i: s.post(url, json={
+                     "queries": [f"batch query {i} {j}" for j in range(args.batch_size)], "k": 5}))
+
+    server.should_exit = True
+    stub.shutdown()
+
+    print(f"docs={args.docs} dim={args.dim} concurrency={args.concurrency} "
+          f"stub latency={args.latency * 1000:.0f} ms\n")
+    print(f"{'endpoint':<16}{'requests':>9}{'queries/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'server p50':>12}")
+    for name, (wall, latencies, server_ms), per_request in (("/search", single, 1),
+                                                            ("/search/batch", batch, args.batch_size)):
+        print(f"{name:<16}{len(latencies):>9}{len(latencies) * per_request / wall:>11.0f}"
+              f"{np.percentile(latencies, 50):>9.2f}{np.percentile(latencies, 99):>9.2f}"
+              f"{np.percentile(server_ms, 50):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+Persistent, content-addressed embedding cache.
+
+Embeddings are keyed by sha256(model + text) and stored on disk as a
+memory-mapped float32 matrix (`vectors-<generation>.f32`) plus an offset
+index (`index.json`, key -> row). A small in-memory LRU sits in front of it.
+
+Evicting rows never rewrites the live matrix: compaction copies the
+survivors into the next generation's file, and replacing `index.json` is
+the single step that switches over. A crash at any point reopens one
+consistent generation.
+
+New keys are appended to a log (`index-<generation>.log`) rather than
+rewriting the whole index per miss; `commit()` pushes the log to the OS and
+folds it into `index.json` once it is as long as the index itself.
+
+The cache is wiped when the model name or the embedding dimension changes,
+so stale vectors from another model can never be returned.
+"""
+import glob
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+FORMAT_VERSION = 2
+# Fold the key log into index.json once it has this many entries (or more
+# than the index itself), so a snapshot costs O(1) amortised per new key
+LOG_SNAPSHOT_ENTRIES = 4096
+
+
+def cache_key(model, text):
+    """Content address of a (model, text) pair"""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU + memory-mapped disk) embedding cache"""
+
+    def __init__(self, path, model, dim=None, max_memory_bytes=64 * 2**20,
+                 max_disk_bytes=2 * 2**30):
+        self.path = path
+        self.model = model
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> vector, most recently used last
+        self._memory_bytes = 0
+        self._index = {}  # key -> row in vectors.f32, least recently used first
+        self._vectors = None
+        self._capacity = 0
+        self._generation = 0
+        self._log = None
+        self._log_entries = 0
+        self._snapshot = False  # index.json exists for the current contents
+        self.dim = None
+
+        os.makedirs(path, exist_ok=True)
+        self._meta_path = os.path.join(path, "meta.json")
+        self._index_path = os.path.join(path, "index.json")
+        self._vectors_path = self._vectors_file(0)
+        self._load(dim)
+
+    # -- disk tier -------------------------------------------------------
+
+    def _vectors_file(self, generation):
+        return os.path.join(self.path, f"vectors-{generation}.f32")
+
+    def _log_file(self, generation):
+        return os.path.join(self.path, f"index-{generation}.log")
+
+    def _remove_stale(self, pattern, keep):
+        for p in glob.glob(os.path.join(self.path, pattern)):
+            if p != keep:
+                os.remove(p)
+
+    def _load(self, dim):
+        meta = index = None
+        if os.path.exists(self._meta_path) and os.path.exists(self._index_path):
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            with open(self._index_path) as f:
+                index = json.load(f)
+        valid = (
+            meta is not None
+            and meta.get("version") == FORMAT_VERSION
+            and meta.get("model") == self.model
+            and (dim is None or meta.get("dim") == dim)
+            and os.path.exists(self._vectors_file(index.get("generation", -1)))
+        )
+        if not valid:
+            self.clear()
+            self.dim = dim
+            return
+
+        self.dim = meta["dim"]
+        self._snapshot = True
+        self._generation = index["generation"]
+        self._index = index["rows"]
+        self._vectors_path = self._vectors_file(self._generation)
+        # Left behind by a compaction that crashed before switching over
+        self._remove_stale("vectors*.f32", keep=self._vectors_path)
+        self._remove_stale("index-*.log", keep=self._log_file(self._generation))
+        self._capacity = os.path.getsize(self._vectors_path) // (4 * self.dim)
+        self._replay_log()
+        if self._capacity:
+            self._vectors = np.memmap(self._vectors_path, dtype="float32", mode="r+",
+                                      shape=(self._capacity, self.dim))
+
+    def _replay_log(self):
+        """Apply keys appended since index.json was written"""
+        path = self._log_file(self._generation)
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            for line in f:
+                # A torn last line (no newline) was never committed
+                if not line.endswith("\n"):
+                    break
+                key, row = line.split()
+                if int(row) < self._capacity:
+                    self._index.pop(key, None)
+                    self._index[key] = int(row)
+                    self._log_entries += 1
+
+    def _append_log(self, key, row):
+        if self._log is None:
+            self._log = open(self._log_file(self._generation), "a")
+        self._log.write(f"{key} {row}\n")
+        self._log_entries += 1
+
+    def _reset_log(self):
+        """Everything logged is in index.json now"""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        self._log_entries = 0
+        self._remove_stale("index-*.log", keep=None)
+
+    def clear(self):
+        """Drop every cached vector, on disk and in memory"""
+        self._reset_log()
+        self._snapshot = False
+        self._vectors = None
+        self._capacity = 0
+        self._index = {}
+        self._memory.clear()
+        self._memory_bytes = 0
+        self._generation = 0
+        self._vectors_path = self._vectors_file(0)
+        for p in (self._meta_path, self._index_path):
+            if os.path.exists(p):
+                os.remove(p)
+        self._remove_stale("vectors*.f32", keep=None)
+
+    def _max_rows(self):
+        return max(1, self.max_disk_bytes // (4 * self.dim))
+
+    def _grow(self, needed):
+        """Make room for `needed` rows in the memmap, doubling the file up to
+        `max_disk_bytes` (`_put_disk` compacts before `needed` exceeds that)"""
+        if needed <= self._capacity:
+            return
+        capacity = min(max(needed, 2 * self._capacity, 1024), self._max_rows())
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * 4 * self.dim)
+        self._capacity = capacity
+        self._vectors = np.memmap(self._vectors_path, dtype="float32", mode="r+",
+                                  shape=(capacity, self.dim))
+
+    def _compact(self, keep):
+        """Evict least recently used rows until only `keep` remain
+
+        Survivors are copied into the next generation's file; the live one is
+        only deleted once the new index that points at the copy is on disk.
+        """
+        survivors = list(self._index.items())[-keep:] if keep else []
+        generation = self._generation + 1
+        path = self._vectors_file(generation)
+        capacity = min(max(2 * len(survivors), 1024), self._max_rows())
+        vectors = np.memmap(path, dtype="float32", mode="w+", shape=(capacity, self.dim))
+        if survivors:
+            vectors[:len(survivors)] = self._vectors[[row for _, row in survivors]]
+        vectors.flush()
+
+        old_path = self._vectors_path
+        self._vectors, self._capacity = vectors, capacity
+        self._vectors_path, self._generation = path, generation
+        self._index = {key: new_row for new_row, (key, _) in enumerate(survivors)}
+        self._write_index()
+        os.remove(old_path)
+
+    def _put_disk(self, key, vector):
+        if key in self._index:
+            self._index[key] = self._index.pop(key)
+            return
+        if len(self._index) >= self._max_rows():
+            self._compact(self._max_rows() // 2)
+        row = len(self._index)
+        self._grow(row + 1)
+        self._vectors[row] = vector
+        self._index[key] = row
+        self._append_log(key, row)
+
+    def _write_index(self):
+        """Atomically replace meta.json, then index.json (the commit point)"""
+        if self._vectors is not None:
+            self._vectors.flush()
+        for p, data in ((self._meta_path, {"version": FORMAT_VERSION, "model": self.model,
+                                           "dim": self.dim}),
+                        (self._index_path, {"generation": self._generation,
+                                            "rows": self._index})):
+            tmp = p + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, p)
+        self._snapshot = True
+        self._reset_log()
+
+    def commit(self):
+        """Make new keys survive a crash of this process; cheap enough per query"""
+        with self._lock:
+            if self._log is not None:
+                self._log.flush()
+            # The log only means something on top of an index.json
+            if not self._snapshot or \
+                    self._log_entries >= max(LOG_SNAPSHOT_ENTRIES, len(self._index)):
+                self._write_index()
+
+    def flush(self):
+        """Persist the offset index and metadata; vectors are already mmapped"""
+        with self._lock:
+            if self.dim is not None:
+                self._write_index()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    # -- memory tier -----------------------------------------------------
+
+    def _put_memory(self, key, vector):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = vector
+        self._memory_bytes += vector.nbytes
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    # -- public API ------------------------------------------------------
+
+    def get(self, text):
+        """Return the cached vector for `text`, or None"""
+        key = cache_key(self.model, text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector
+            row = self._index.get(key)
+            if row is None:
+                self.misses += 1
+                return None
+            # Mark as recently used for disk eviction too
+            self._index[key] = self._index.pop(key)
+            vector = np.array(self._vectors[row])
+            self._put_memory(key, vector)
+            self.hits += 1
+            return vector
+
+    def put(self, text, vector):
+        vector = np.asarray(vector, dtype="float32")
+        with self._lock:
+            if self.dim is None:
+                self.dim = len(vector)
+            elif len(vector) != self.dim:
+                # New model output shape: everything on disk is stale
+                self.clear()
+                self.dim = len(vector)
+            key = cache_key(self.model, text)
+            self._put_disk(key, vector)
+            self._put_memory(key, vector)
+
+    def __len__(self):
+        return len(self._index)
+
+
+class CachedEmbedder:
+    """Wrap an embedding client so only uncached texts hit the network"""
+
+    def __init__(self, client, cache):
+        self.client = client
+        self.cache = cache
+
+    @property
+    def model(self):
+        return self.client.model
+
+    @property
+    def calls(self):
+        return self.client.calls
+
+    def dimension(self):
+        if self.cache.dim is not None:
+            return self.cache.dim
+        return self.client.dimension()
+
+    def embed_into(self, texts, out, offset=0):
+        """Fill rows of `out` from the cache, embedding only the misses"""
+        texts = list(texts)
+        missing = {}  # text -> rows that need it
+        for i, text in enumerate(texts):
+            vector = self.cache.get(text)
+            if vector is None:
+                missing.setdefault(text, []).append(offset + i)
+            else:
+                out[offset + i] = vector
+
+        if missing:
+            unique = list(missing)
+            fresh = self.client.embed(unique)
+            if fresh.shape[1] != out.shape[1]:
+                # The model behind this name changed; put() below wipes the cache
+                self.cache.put(unique[0], fresh[0])
+                raise ValueError(
+                    f"Embedding dimension changed from {out.shape[1]} to {fresh.shape[1]}; "
+                    "the cache was invalidated, rebuild the index"
+                )
+            for text, vector in zip(unique, fresh):
+                self.cache.put(text, vector)
+                out[missing[text]] = vector
+            self.cache.commit()
+        return out
+
+    def embed(self, texts):
+        texts = list(texts)
+        X = np.zeros((len(texts), self.dimension()), dtype="float32")
+        return self.embed_into(texts, X)
+
+    def embed_one(self, text):
+        vector = self.cache.get(text)
+        if vector is None:
+            vector = self.client.embed_one(text)
+            self.cache.put(text, vector)
+            self.cache.commit()
+        return vector
+
+    def close(self):
+        self.cache.close()
+        self.client.close()
@@ -0,0 +1,121 @@
+"""
+Batched, concurrent embedding client for Ollama.
+
+Replaces the one-request-per-title loop with:
+- a pooled `requests.Session` (keep-alive, no new TCP connection per text)
+- Ollama's batch `/api/embed` endpoint (many texts per request)
+- a bounded thread pool so several batches are in flight at once
+- retries with exponential backoff on connection errors and 5xx/429
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+OLLAMA_URL = "http://localhost:11434"
+DEFAULT_MODEL = "phi3"
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class EmbeddingError(RuntimeError):
+    """Raised when a batch still fails after all retries"""
+
+
+class OllamaEmbeddingClient:
+    """Embed texts in batches over a pooled HTTP session"""
+
+    def __init__(self, model=DEFAULT_MODEL, base_url=OLLAMA_URL, batch_size=32,
+                 max_in_flight=4, max_retries=3, backoff=0.5, timeout=60, dim=None):
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.calls = 0  # number of HTTP requests sent, handy for benchmarks
+
+        # One connection per in-flight request, all kept alive between batches
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._dim = dim
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _post_batch(self, texts):
+        """POST one batch to /api/embed, retrying with backoff"""
+        url = f"{self.base_url}/api/embed"
+        payload = {"model": self.model, "input": list(texts)}
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.calls += 1
+                res = self.session.post(url, json=payload, timeout=self.timeout)
+                if res.status_code not in RETRY_STATUS:
+                    res.raise_for_status()
+                    embeddings = res.json()["embeddings"]
+                    if len(embeddings) != len(texts):
+                        raise EmbeddingError(
+                            f"Expected {len(texts)} embeddings, got {len(embeddings)}"
+                        )
+                    return embeddings
+                error = EmbeddingError(f"HTTP {res.status_code} from {url}")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            if attempt < self.max_retries:
+                time.sleep(self.backoff * (2 ** attempt))
+        raise EmbeddingError(f"Embedding batch failed after {self.max_retries + 1} attempts: {error}")
+
+    def dimension(self):
+        """Embedding dimension, detected from a single probe request"""
+        if self._dim is None:
+            self._dim = len(self._post_batch(["dimension probe"])[0])
+        return self._dim
+
+    def embed_into(self, texts, out, offset=0):
+        """Embed `texts` and write them into rows offset.. of `out` in place"""
+        texts = list(texts)
+        if not texts:
+            return out
+        batches = [
+            (start, texts[start:start + self.batch_size])
+            for start in range(0, len(texts), self.batch_size)
+        ]
+
+        def run(batch):
+            start, chunk = batch
+            rows = np.asarray(self._post_batch(chunk), dtype="float32")
+            out[offset + start:offset + start + len(chunk)] = rows
+            return len(chunk)
+
+        if len(batches) == 1 or self.max_in_flight <= 1:
+            for batch in batches:
+                run(batch)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+                # list() re-raises the first failed batch
+                list(pool.map(run, batches))
+        return out
+
+    def embed(self, texts):
+        """Embed `texts` into a new (n, d) float32 matrix"""
+        texts = list(texts)
+        X = np.zeros((len(texts), self.dimension()), dtype="float32")
+        return self.embed_into(texts, X)
+
+    def embed_one(self, text):
+        """Embed a single text into a (d,) float32 vector"""
+        vector = np.asarray(self._post_batch([text])[0], dtype="float32")
+        self._dim = len(vector)
+        return vector
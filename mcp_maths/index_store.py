@@ -0,0 +1,308 @@
+"""
+Persisted FAISS index with incremental add/remove.
+
+Layout of an index directory:
+- index-<gen>.faiss  FAISS `IndexIDMap` (document id -> vector), memory-mapped on load
+- titles.bin         utf-8 text of every document, append-only
+- titles.idx         int64 rows of (id, offset, length), memory-mapped on load;
+                     a removed document keeps its row with length -1
+- vectors.f32        optional full-precision copy of every vector (row = document
+                     id), memory-mapped; used to re-rank quantised indexes
+- lexical-<gen>.json optional BM25 inverted index over the same document ids
+- meta.json          dimension, index kind/parameters, the next free document id,
+                     the current generation and caller state (`IndexStore.state`)
+
+Opening a store only maps these files, so startup cost does not grow with
+the corpus; documents are embedded once and then added or removed in place.
+
+Every save writes the FAISS and BM25 files of a new generation and then
+replaces meta.json, which names them: that replace is the only commit point.
+A crash before it leaves the previous generation, its `next_id` and its
+`state` in force, and the titles written since are dropped on open.
+"""
+import json
+import os
+
+import faiss
+import numpy as np
+
+from ann_index import (NO_REMOVE_KINDS, higher_is_better, make_index, prepare_vectors,
+                       rerank, set_search_params, train_index)
+from lexical_index import BM25Index
+
+FORMAT_VERSION = 1
+
+
+class DocTable:
+    """Append-only id -> title table backed by two memory-mapped files"""
+
+    def __init__(self, path):
+        self._bin_path = os.path.join(path, "titles.bin")
+        self._idx_path = os.path.join(path, "titles.idx")
+        for p in (self._bin_path, self._idx_path):
+            if not os.path.exists(p):
+                open(p, "wb").close()
+        self._remap()
+
+    def _remap(self):
+        rows = os.path.getsize(self._idx_path) // (3 * 8)
+        self._rows = (np.memmap(self._idx_path, dtype="int64", mode="r+", shape=(rows, 3))
+                      if rows else np.zeros((0, 3), dtype="int64"))
+        size = os.path.getsize(self._bin_path)
+        self._text = np.memmap(self._bin_path, dtype="uint8", mode="r") if size else None
+
+    def _row(self, doc_id):
+        i = np.searchsorted(self._rows[:, 0], doc_id)
+        if i < len(self._rows) and self._rows[i, 0] == doc_id and self._rows[i, 2] >= 0:
+            return i
+        return None
+
+    def append(self, ids, titles):
+        """Append documents; ids must be larger than every id already stored"""
+        offset = os.path.getsize(self._bin_path)
+        rows = []
+        with open(self._bin_path, "ab") as f:
+            for doc_id, title in zip(ids, titles):
+                data = title.encode("utf-8")
+                f.write(data)
+                rows.append((doc_id, offset, len(data)))
+                offset += len(data)
+        with open(self._idx_path, "ab") as f:
+            f.write(np.asarray(rows, dtype="int64").tobytes())
+        self._remap()
+
+    def truncate(self, next_id):
+        """Drop every document with an id >= `next_id` (ids are stored in order)"""
+        i = int(np.searchsorted(self._rows[:, 0], next_id))
+        if i == len(self._rows):
+            return
+        offset = int(self._rows[i, 1])
+        self._rows = self._text = None  # unmap before shrinking the files
+        with open(self._idx_path, "r+b") as f:
+            f.truncate(i * 3 * 8)
+        with open(self._bin_path, "r+b") as f:
+            f.truncate(offset)
+        self._remap()
+
+    def remove(self, ids):
+        removed = []
+        for doc_id in ids:
+            i = self._row(doc_id)
+            if i is not None:
+                self._rows[i, 2] = -1
+                removed.append(doc_id)
+        if removed:
+            self._rows.flush()
+        return removed
+
+    def get(self, doc_id):
+        """Title of `doc_id`, or None if it was never added or was removed"""
+        i = self._row(doc_id)
+        if i is None:
+            return None
+        _, offset, length = self._rows[i]
+        return bytes(self._text[offset:offset + length]).decode("utf-8")
+
+    def __contains__(self, doc_id):
+        return self._row(doc_id) is not None
+
+    def __len__(self):
+        return int(np.count_nonzero(self._rows[:, 2] >= 0))
+
+    def items(self):
+        for doc_id in self._rows[:, 0]:
+            title = self.get(int(doc_id))
+            if title is not None:
+                yield int(doc_id), title
+
+
+class VectorFile:
+    """Full-precision float32 vectors on disk, row = document id"""
+
+    def __init__(self, path, dim):
+        self._path = os.path.join(path, "vectors.f32")
+        self.dim = dim
+        if not os.path.exists(self._path):
+            open(self._path, "wb").close()
+        self._remap()
+
+    def _remap(self):
+        rows = os.path.getsize(self._path) // (4 * self.dim)
+        self.vectors = (np.memmap(self._path, dtype="float32", mode="r", shape=(rows, self.dim))
+                        if rows else np.zeros((0, self.dim), dtype="float32"))
+
+    def write(self, ids, vectors):
+        with open(self._path, "r+b") as f:
+            # ids are consecutive, so one contiguous write per batch
+            f.seek(int(ids[0]) * 4 * self.dim)
+            f.write(np.ascontiguousarray(vectors, dtype="float32").tobytes())
+        self._remap()
+
+
+class IndexStore:
+    """FAISS index plus its id -> title table, persisted together
+
+    `kind`, `metric` and `params` pick the backend (see `ann_index`) when a
+    new index is created; an existing index keeps the settings it was built with.
+    With `rerank=True` a full-precision copy of the vectors is kept next to the
+    index and the top `rerank_factor * k` candidates are re-scored against it.
+    With `lexical=True` a BM25 index over the titles is maintained alongside.
+    """
+
+    def __init__(self, path, dim=None, kind="flat", metric="l2", rerank=False,
+                 rerank_factor=4, lexical=False, **params):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._meta_path = os.path.join(path, "meta.json")
+
+        meta = {}
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+        if meta and (meta.get("version") != FORMAT_VERSION
+                     or (dim is not None and meta.get("dim") != dim)):
+            raise ValueError(
+                f"Index at {path} has dimension {meta.get('dim')}, expected {dim}; "
+                "delete it to rebuild"
+            )
+
+        self.dim = meta.get("dim", dim)
+        self.kind = meta.get("kind", kind)
+        self.metric = meta.get("metric", metric)
+        self.params = meta.get("params", params)
+        self.rerank = meta.get("rerank", rerank)
+        self.rerank_factor = rerank_factor
+        self.full_vectors = None
+        self.lexical = lexical or meta.get("lexical", False)
+        # Stores saved before generations existed use the unnumbered names
+        self.generation = meta.get("generation", 0)
+        self._index_path = os.path.join(path, meta.get("index_file", "index.faiss"))
+        self._lexical_path = os.path.join(path, meta.get("lexical_file", "lexical.json"))
+        # Caller state saved atomically with the index, e.g. ingest progress
+        self.state = meta.get("state", {})
+        self._bm25 = None
+        self.docs = DocTable(path)
+        # Titles are appended as documents are added but the FAISS index is
+        # only written by save(): drop titles an interrupted run left past the
+        # last save, so a resumed ingest adds them again exactly once
+        self.next_id = meta.get("next_id", 0)
+        self.docs.truncate(self.next_id)
+        self.index = None
+        if os.path.exists(self._index_path):
+            # Memory-map the vectors instead of reading them into RAM
+            self.index = faiss.read_index(self._index_path, faiss.IO_FLAG_MMAP)
+            self.dim = self.index.d
+        if self.rerank and self.dim is not None:
+            self.full_vectors = VectorFile(path, self.dim)
+
+    @property
+    def bm25(self):
+        """The BM25 index, loaded on first use (built from the titles if missing)"""
+        if self._bm25 is None and self.lexical:
+            if os.path.exists(self._lexical_path):
+                self._bm25 = BM25Index.load(self._lexical_path)
+            else:
+                self._bm25 = BM25Index()
+                items = list(self.docs.items())
+                self._bm25.add([i for i, _ in items], [t for _, t in items])
+        return self._bm25
+
+    @property
+    def ntotal(self):
+        return 0 if self.index is None else self.index.ntotal
+
+    def _ensure_index(self, dim):
+        if self.index is None:
+            self.dim = dim
+            self.index = make_index(self.kind, dim, self.metric, **self.params)
+            if self.rerank:
+                self.full_vectors = VectorFile(self.path, dim)
+
+    def add(self, titles, vectors):
+        """Add documents with their (n, d) float32 vectors, return their new ids
+
+        For the cosine metric a float32 `vectors` array is normalised in place.
+        """
+        titles = list(titles)
+        vectors = prepare_vectors(vectors, self.metric)
+        if not titles:
+            return np.zeros(0, dtype="int64")
+        self._ensure_index(vectors.shape[1])
+        # IVF/PQ indexes learn their cells from the first batch they see
+        train_index(self.index, vectors)
+        ids = np.arange(self.next_id, self.next_id + len(titles), dtype="int64")
+        self.index.add_with_ids(vectors, ids)
+        if self.full_vectors is not None:
+            self.full_vectors.write(ids, vectors)
+        self.docs.append(ids, titles)
+        if self.lexical:
+            self.bm25.add(ids, titles)
+        self.next_id += len(titles)
+        return ids
+
+    def remove(self, ids):
+        """Remove documents by id, return how many were removed (not supported by hnsw)"""
+        if self.kind in NO_REMOVE_KINDS:
+            raise RuntimeError(f"{self.kind} indexes do not support removal; "
+                               "rebuild the index without these documents")
+        present = [int(i) for i in ids if int(i) in self.docs]
+        if not present:
+            return 0
+        # FAISS first: if it fails, titles and BM25 still match the vectors
+        if self.index is not None:
+            self.index.remove_ids(np.asarray(present, dtype="int64"))
+        if self.lexical:
+            self.bm25.remove(present, [self.docs.get(i) for i in present])
+        return len(self.docs.remove(present))
+
+    def set_search_params(self, nprobe=None, ef_search=None):
+        if self.index is not None:
+            set_search_params(self.index, nprobe=nprobe, ef_search=ef_search)
+
+    def search(self, vectors, k):
+        """Search the index with an (n, d) float32 query matrix
+
+        Queries must already be prepared for the metric (see `prepare_vectors`).
+        """
+        if self.index is None or self.index.ntotal == 0:
+            n = len(vectors)
+            empty = -np.inf if higher_is_better(self.metric) else np.inf
+            return np.full((n, k), empty, dtype="float32"), np.full((n, k), -1, dtype="int64")
+        if self.full_vectors is None:
+            return self.index.search(vectors, k)
+        _, candidates = self.index.search(vectors, k * self.rerank_factor)
+        return rerank(vectors, candidates, self.full_vectors.vectors, k, self.metric)
+
+    def title(self, doc_id):
+        return self.docs.get(int(doc_id))
+
+    def save(self):
+        """Commit the index, BM25 postings, `state` and metadata as one new generation
+
+        Titles are already on disk.
+        """
+        generation = self.generation + 1
+        index_file = f"index-{generation}.faiss"
+        # BM25 never loaded means its postings are unchanged: keep the current file
+        lexical_file = (f"lexical-{generation}.json" if self._bm25 is not None
+                        else os.path.basename(self._lexical_path))
+        if self.index is not None:
+            faiss.write_index(self.index, os.path.join(self.path, index_file))
+        if self._bm25 is not None:
+            self._bm25.save(os.path.join(self.path, lexical_file))
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": FORMAT_VERSION, "dim": self.dim, "kind": self.kind,
+                       "metric": self.metric, "params": self.params, "rerank": self.rerank,
+                       "lexical": self.lexical, "next_id": self.next_id,
+                       "generation": generation, "index_file": index_file,
+                       "lexical_file": lexical_file, "state": self.state}, f)
+        os.replace(tmp, self._meta_path)
+
+        old = (self._index_path, self._lexical_path)
+        self.generation = generation
+        self._index_path = os.path.join(self.path, index_file)
+        self._lexical_path = os.path.join(self.path, lexical_file)
+        for path in old:
+            if path not in (self._index_path, self._lexical_path) and os.path.exists(path):
+                os.remove(path)
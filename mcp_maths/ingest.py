@@ -0,0 +1,180 @@
+"""
+Streaming document ingestion for the semantic search index.
+
+Documents are read lazily from JSONL, CSV or plain-text files, embedded in
+fixed-size batches into one reused buffer and added to the index batch by
+batch, so memory is bounded by `batch_size`, not by the corpus.
+
+Progress is checkpointed per file; running the same command again after an
+interruption skips everything that was already indexed:
+
+    python ingest.py data/articles.jsonl data/more.csv --field title
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+
+import numpy as np
+
+from embedding_cache import CachedEmbedder, EmbeddingCache
+from embedding_client import OllamaEmbeddingClient
+from index_store import IndexStore
+
+
+def read_jsonl(path, field="text"):
+    """Yield (record number, text) for every JSON line with `field`"""
+    with open(path, encoding="utf-8") as f:
+        for position, line in enumerate(f):
+            line = line.strip()
+            if line:
+                text = json.loads(line).get(field)
+                if text:
+                    yield position, str(text)
+
+
+def read_csv(path, field="text"):
+    """Yield (row number, text) from the `field` column of a CSV file"""
+    with open(path, encoding="utf-8", newline="") as f:
+        for position, row in enumerate(csv.DictReader(f)):
+            text = row.get(field)
+            if text:
+                yield position, text
+
+
+def read_text(path, field=None):
+    """Yield (line number, text) for every non-empty line"""
+    with open(path, encoding="utf-8") as f:
+        for position, line in enumerate(f):
+            line = line.strip()
+            if line:
+                yield position, line
+
+
+READERS = {".jsonl": read_jsonl, ".json": read_jsonl, ".csv": read_csv}
+
+
+def iter_documents(path, field="text", start=0):
+    """Yield (position, text) from `path`, skipping positions before `start`"""
+    reader = READERS.get(os.path.splitext(path)[1].lower(), read_text)
+    for position, text in reader(path, field):
+        if position >= start:
+            yield position, text
+
+
+def batched(iterable, n):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, n)):
+        yield batch
+
+
+class Checkpoint:
+    """Per-file resume positions, kept in the store's metadata
+
+    `save()` saves the store: positions and indexed documents are committed
+    by the same meta.json replace, so neither can get ahead of the other.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.files = store.state.setdefault("ingest", {})
+
+    def position(self, source):
+        return self.files.get(os.path.abspath(source), {}).get("position", 0)
+
+    def done(self, source):
+        return self.files.get(os.path.abspath(source), {}).get("done", False)
+
+    def update(self, source, position, done=False):
+        self.files[os.path.abspath(source)] = {"position": position, "done": done}
+
+    def save(self):
+        self.store.save()
+
+
+def ingest_texts(texts, store, embedder, batch_size=256, on_batch=None):
+    """Embed and index an iterable of texts batch by batch, return the count
+
+    `on_batch(n_added)` is called after each batch has been added.
+    """
+    buffer = None
+    total = 0
+    for batch in batched(texts, batch_size):
+        if buffer is None:
+            buffer = np.empty((batch_size, embedder.dimension()), dtype="float32")
+        X = buffer[:len(batch)]
+        embedder.embed_into(batch, X)
+        store.add(batch, X)
+        total += len(batch)
+        if on_batch:
+            on_batch(len(batch))
+    return total
+
+
+def ingest_files(paths, store, embedder, field="text", batch_size=256, save_every=10):
+    """Stream documents from files into `store`, resuming from a checkpoint
+
+    The index and the checkpoint are committed together every `save_every`
+    batches and at the end of each file. A restart re-embeds the batches
+    since the last save; the store drops their titles on open, so they are
+    not stored twice.
+    """
+    checkpoint = Checkpoint(store)
+    total = 0
+    for path in paths:
+        if checkpoint.done(path):
+            print(f"✓ {path} already ingested, skipping")
+            continue
+        start = checkpoint.position(path)
+        if start:
+            print(f"Resuming {path} at record {start}")
+
+        documents = iter_documents(path, field, start)
+        last_position = start - 1
+        batches = 0
+
+        def texts():
+            nonlocal last_position
+            for position, text in documents:
+                last_position = position
+                yield text
+
+        def on_batch(n):
+            nonlocal batches
+            batches += 1
+            if batches % save_every == 0:
+                checkpoint.update(path, last_position + 1)
+                checkpoint.save()
+                print(f"  {path}: indexed up to record {last_position} ({store.ntotal} vectors)")
+
+        total += ingest_texts(texts(), store, embedder, batch_size, on_batch)
+        checkpoint.update(path, last_position + 1, done=True)
+        checkpoint.save()
+        print(f"✓ {path} done ({store.ntotal} vectors in index)")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream documents into the FAISS index")
+    parser.add_argument("paths", nargs="+", help="JSONL, CSV or text files")
+    parser.add_argument("--field", default="text", help="JSON key or CSV column holding the text")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--model", default="phi3")
+    parser.add_argument("--index-dir", default=".faiss_index")
+    parser.add_argument("--cache-dir", default=".embedding_cache")
+    parser.add_argument("--kind", default="flat", help="index backend for a new index")
+    parser.add_argument("--metric", default="cosine", help="metric for a new index")
+    args = parser.parse_args()
+
+    embedder = CachedEmbedder(
+        OllamaEmbeddingClient(model=args.model, batch_size=64, max_in_flight=4),
+        EmbeddingCache(args.cache_dir, model=args.model),
+    )
+    store = IndexStore(args.index_dir, kind=args.kind, metric=args.metric)
+    total = ingest_files(args.paths, store, embedder, args.field, args.batch_size)
+    print(f"\n✓ Ingested {total} documents in {embedder.calls} embedding requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+In-process BM25 inverted index, kept next to the FAISS index.
+
+Embeddings miss exact keywords ("Webb", "5G"); BM25 finds them without an
+embedding round trip. Both indexes use the same document ids, so their
+result lists can be fused with reciprocal-rank fusion (`rrf_fuse`).
+"""
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the to was "
+    "were will with".split()
+)
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index of term -> {doc id: term frequency}"""
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)
+        self.doc_lengths = {}
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, ids, texts):
+        for doc_id, text in zip(ids, texts):
+            doc_id = int(doc_id)
+            terms = Counter(tokenize(text))
+            for term, tf in terms.items():
+                self.postings[term][doc_id] = tf
+            length = sum(terms.values())
+            self.doc_lengths[doc_id] = length
+            self._total_length += length
+
+    def remove(self, ids, texts):
+        """Remove documents; their texts are needed to find their postings"""
+        for doc_id, text in zip(ids, texts):
+            doc_id = int(doc_id)
+            if doc_id not in self.doc_lengths:
+                continue
+            for term in set(tokenize(text)):
+                docs = self.postings.get(term)
+                if docs is not None:
+                    docs.pop(doc_id, None)
+                    if not docs:
+                        del self.postings[term]
+            self._total_length -= self.doc_lengths.pop(doc_id)
+
+    def is_keyword_query(self, query, max_terms=1):
+        """True for exact-term lookups that can skip the embedding call
+
+        That is a single indexed term ("Webb"), or indexed terms that all
+        contain digits ("5G", "A100 H100"). Ordinary phrases such as
+        "climate change" still go to the embeddings.
+        """
+        terms = tokenize(query)
+        if not terms or not all(t in self.postings for t in terms):
+            return False
+        return len(terms) <= max_terms or all(any(c.isdigit() for c in t) for t in terms)
+
+    def search(self, query, k=10):
+        """Top-k (doc id, BM25 score) pairs, best first"""
+        n = len(self.doc_lengths)
+        if not n:
+            return []
+        avgdl = self._total_length / n
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avgdl)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def save(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"k1": self.k1, "b": self.b, "doc_lengths": self.doc_lengths,
+                       "postings": self.postings}, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        index = cls()
+        if not os.path.exists(path):
+            return index
+        with open(path) as f:
+            data = json.load(f)
+        index.k1, index.b = data["k1"], data["b"]
+        # JSON object keys are strings; document ids are ints
+        index.doc_lengths = {int(d): n for d, n in data["doc_lengths"].items()}
+        index._total_length = sum(index.doc_lengths.values())
+        for term, docs in data["postings"].items():
+            index.postings[term] = {int(d): tf for d, tf in docs.items()}
+        return index
+
+
+def rrf_fuse(result_lists, k=10, c=60):
+    """Reciprocal-rank fusion of ranked id lists: score = sum 1 / (c + rank)"""
+    scores = defaultdict(float)
+    for results in result_lists:
+        for rank, doc_id in enumerate(results, 1):
+            scores[doc_id] += 1 / (c + rank)
+    return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
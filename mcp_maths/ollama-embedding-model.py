@@ -1,6 +1,8 @@
-import faiss
-import requests
-import numpy as np
+from embedding_cache import CachedEmbedder, EmbeddingCache
+from embedding_client import OllamaEmbeddingClient
+from index_store import IndexStore
+from ingest import ingest_texts
+from searcher import Searcher
 
 titles = [
     # AI & Machine Learning
@@ -48,57 +50,96 @@ titles = [
     "Dark Matter Mystery Deepens with New Observations",
 ]
 
-# Get the first embedding to determine dimension
-print("Generating embeddings for titles...")
-res = requests.post("http://localhost:11434/api/embeddings", json={
-    "model": "phi3",
-    "prompt": titles[0]
-})
-first_embedding = np.array(res.json()['embedding'], dtype='float32')
-d = len(first_embedding)
-print(f"Detected embedding dimension: {d}\n")
-
-# Build the index with L2 distance
-index = faiss.IndexFlatL2(d)
-
-X = np.zeros(shape=(len(titles), d), dtype='float32')
-X[0] = first_embedding
-print(f"✓ Embedded: {titles[0][:50]}...")
-
-# Continue with remaining titles
-for i, title in enumerate(titles[1:], start=1):
-    res = requests.post("http://localhost:11434/api/embeddings", json={
-        "model": "phi3",
-        "prompt": title
-    })
-    embedding = res.json()['embedding']
-    X[i] = np.array(embedding, dtype='float32')
-    print(f"✓ Embedded: {title[:50]}...")
-
-index.add(X)
-print(f"\n✓ Index built with {index.ntotal} vectors\n")
-
-
-def search(query, k=3):
-    """Search the index for similar titles"""
+MODEL = "phi3"
+CACHE_DIR = ".embedding_cache"
+INDEX_DIR = ".faiss_index"
+
+# Index backend, see ann_index.py. "flat" is exact and right for a few
+# thousand documents; "ivf_flat", "ivf_pq" or "hnsw" scale to millions
+# (IVF kinds need a first batch of at least `nlist` documents to train on).
+# "sq_fp16" / "sq8" store vectors as float16 / int8; with RERANK the top
+# candidates are re-scored against a memory-mapped float32 copy.
+INDEX_KIND = "flat"
+RERANK = False
+# "hybrid" fuses FAISS with a BM25 keyword index (exact matches such as
+# "Webb" or "5G" skip the embedding call); "vector" is FAISS only
+SEARCH_MODE = "hybrid"
+# "cosine" ranks by true cosine similarity (scores in [-1, 1], comparable
+# across queries); "l2" is the original Euclidean ranking
+METRIC = "cosine"
+INDEX_PARAMS = {}
+SEARCH_PARAMS = {"nprobe": 16, "ef_search": 64}
+
+# Titles (and queries) already embedded by an earlier run come straight
+# from the on-disk cache; only new text goes to Ollama, in batches
+embedder = CachedEmbedder(
+    OllamaEmbeddingClient(model=MODEL, batch_size=16, max_in_flight=4),
+    EmbeddingCache(CACHE_DIR, model=MODEL),
+)
+
+# The index is opened on the first search, not at import time
+store = None
+searcher = None
+
+
+def get_store():
+    """Open the persisted index, building it from `titles` on first use"""
+    global store
+    if store is None:
+        store = IndexStore(INDEX_DIR, kind=INDEX_KIND, metric=METRIC, rerank=RERANK,
+                           lexical=SEARCH_MODE != "vector", **INDEX_PARAMS)
+        if store.ntotal == 0:
+            print("Generating embeddings for titles...")
+            add_documents(titles)
+        else:
+            print(f"✓ Loaded index with {store.ntotal} vectors from {INDEX_DIR}\n")
+        store.set_search_params(**SEARCH_PARAMS)
+    return store
+
+
+def add_documents(docs, batch_size=256):
+    """Embed and add documents to the index in bounded batches, return how many"""
+    added = ingest_texts(docs, get_store(), embedder, batch_size)
+    store.save()
+    print(f"✓ Embedded {added} documents in {embedder.calls} requests "
+          f"({embedder.cache.hits} cache hits)")
+    print(f"✓ Index has {store.ntotal} vectors\n")
+    return added
+
+
+def remove_documents(ids):
+    """Remove documents from the index by id"""
+    removed = get_store().remove(ids)
+    store.save()
+    return removed
+
+
+def get_searcher():
+    global searcher
+    if searcher is None:
+        searcher = Searcher(get_store(), embedder, mode=SEARCH_MODE)
+    return searcher
+
+
+def search_many(queries, k=3, min_score=None):
+    """Search for several queries in one batch, one list of SearchHits per query"""
+    return get_searcher().search_many(queries, k, min_score)
+
+
+def print_hits(query, hits):
     print(f"Searching for: '{query}'")
-    
-    res = requests.post("http://localhost:11434/api/embeddings", json={
-        "model": "phi3",
-        "prompt": query
-    })
-    query_embedding = np.array(res.json()['embedding'], dtype='float32')
-    
-    # Search the index
-    distances, indices = index.search(np.array([query_embedding]), k=k)
-    
-    print(f"\nTop {k} results:\n")
-    for rank, (idx, distance) in enumerate(zip(indices[0], distances[0]), 1):
-        similarity = 1 / (1 + distance)  # Convert distance to similarity score
-        print(f"{rank}. {titles[idx]}")
-        print(f"   Distance: {distance:.4f} | Similarity: {similarity:.4f}\n")
-    
-    return indices[0], distances[0]
+    print(f"\nTop {len(hits)} results:\n")
+    for rank, hit in enumerate(hits, 1):
+        print(f"{rank}. {hit.title}")
+        distance = "-" if hit.distance is None else f"{hit.distance:.4f}"
+        print(f"   Distance: {distance} | Score: {hit.score:.4f} ({hit.source})\n")
+
+
+def search(query, k=3, min_score=None):
+    """Search the index for similar titles"""
+    hits = search_many([query], k, min_score)[0]
+    print_hits(query, hits)
+    return hits
 
 
 if __name__ == "__main__":
@@ -109,8 +150,11 @@ if __name__ == "__main__":
         'quantum computing breakthroughs',
         'climate change and renewable energy',
         'medical treatments and health',
+        'Webb',
+        '5G',
     ]
     
-    for query in queries:
-        search(query, k=3)
+    # One embedding request and one FAISS call for all queries
+    for query, hits in zip(queries, search_many(queries, k=3)):
+        print_hits(query, hits)
         print("-" * 80 + "\n")
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+Semantic search as an async FastAPI service.
+
+The index is opened once at startup (lifespan hook) and stays warm. Blocking
+embedding and FAISS work runs in a bounded thread pool; concurrent `/search`
+calls are micro-batched into one embedding request and one FAISS call.
+
+Build the index first (`python ollama-embedding-model.py` or `ingest.py`),
+then:
+
+    uvicorn search_service:app --port 8000
+
+Settings come from environment variables: OLLAMA_URL, EMBED_MODEL,
+INDEX_DIR, CACHE_DIR, SEARCH_WORKERS and SEARCH_MODE (vector, lexical or
+hybrid; default hybrid).
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from pydantic import BaseModel, Field
+
+from embedding_cache import CachedEmbedder, EmbeddingCache
+from embedding_client import OLLAMA_URL, OllamaEmbeddingClient
+from index_store import IndexStore
+from searcher import SEARCH_MODES, MicroBatcher, Searcher
+
+MAX_K = 100
+MAX_BATCH_QUERIES = 256
+
+
+class BatchSearchRequest(BaseModel):
+    queries: list[str] = Field(min_length=1, max_length=MAX_BATCH_QUERIES)
+    k: int = Field(3, ge=1, le=MAX_K)
+    min_score: float | None = None
+    mode: str | None = Field(None, pattern="^(" + "|".join(SEARCH_MODES) + ")$")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    model = os.getenv("EMBED_MODEL", "phi3")
+    workers = int(os.getenv("SEARCH_WORKERS", "4"))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search")
+    embedder = CachedEmbedder(
+        OllamaEmbeddingClient(model=model, base_url=os.getenv("OLLAMA_URL", OLLAMA_URL),
+                              batch_size=64, max_in_flight=workers),
+        EmbeddingCache(os.getenv("CACHE_DIR", ".embedding_cache"), model=model),
+    )
+    mode = os.getenv("SEARCH_MODE", "hybrid")
+    # Opening the store only memory-maps it, so this is cheap
+    store = IndexStore(os.getenv("INDEX_DIR", ".faiss_index"), lexical=mode != "vector")
+    if store.lexical:
+        store.bm25  # load the BM25 postings now, not on the first request
+    searcher = Searcher(store, embedder, mode=mode)
+
+    app.state.executor = executor
+    app.state.searcher = searcher
+    app.state.batcher = MicroBatcher(searcher, executor=executor)
+    try:
+        yield
+    finally:
+        executor.shutdown(wait=True)
+        embedder.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+app.title = "Semantic Search"
+app.version = "1.0.0"
+app.description = "FAISS semantic search over Ollama embeddings."
+
+
+@app.middleware("http")
+async def timing_headers(request: Request, call_next):
+    """Report total and per-stage time in Server-Timing / X-Process-Time-Ms"""
+    request.state.timings = {}
+    start = time.perf_counter()
+    response = await call_next(request)
+    total = (time.perf_counter() - start) * 1000
+    stages = [f"{name};dur={ms:.2f}" for name, ms in request.state.timings.items()]
+    response.headers["Server-Timing"] = ", ".join(stages + [f"total;dur={total:.2f}"])
+    response.headers["X-Process-Time-Ms"] = f"{total:.2f}"
+    return response
+
+
+def _require_index(request):
+    if request.app.state.searcher.store.ntotal == 0:
+        raise HTTPException(status_code=503, detail="Index is empty; build it first")
+
+
+def _check_min_score(min_score, mode):
+    if min_score is not None and mode == "lexical":
+        raise HTTPException(status_code=400,
+                            detail="min_score applies to vector scores, not to lexical mode")
+
+
+@app.get("/search")
+async def search(request: Request, q: str = Query(min_length=1),
+                 k: int = Query(3, ge=1, le=MAX_K), min_score: float | None = None):
+    """Search for one query; concurrent calls share one FAISS call"""
+    _require_index(request)
+    searcher = request.app.state.searcher
+    _check_min_score(min_score, searcher.mode)
+    start = time.perf_counter()
+    if min_score is None:
+        hits = await request.app.state.batcher.search(q, k)
+    else:
+        # The threshold applies inside the search, before fusion, so this
+        # query does not share the micro-batch
+        hits = await asyncio.get_running_loop().run_in_executor(
+            request.app.state.executor, searcher.search, q, k, min_score)
+    request.state.timings["search"] = (time.perf_counter() - start) * 1000
+    return {"query": q, "hits": [asdict(hit) for hit in hits]}
+
+
+@app.post("/search/batch")
+async def search_batch(request: Request, body: BatchSearchRequest):
+    """Search for many queries with one embedding batch and one FAISS call"""
+    _require_index(request)
+    _check_min_score(body.min_score, body.mode or request.app.state.searcher.mode)
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    results = await loop.run_in_executor(
+        request.app.state.executor, request.app.state.searcher.search_many,
+        body.queries, body.k, body.min_score, body.mode,
+    )
+    request.state.timings["search"] = (time.perf_counter() - start) * 1000
+    return {
+        "results": [
+            {"query": query, "hits": [asdict(hit) for hit in hits]}
+            for query, hits in zip(body.queries, results)
+        ]
+    }
+
+
+@app.get("/health")
+async def health(request: Request):
+    store = request.app.state.searcher.store
+    return {"status": "ok", "documents": store.ntotal, "kind": store.kind, "metric": store.metric,
+            "mode": request.app.state.searcher.mode}
@@ -0,0 +1,209 @@
+"""
+Batched multi-query search over an `IndexStore`.
+
+`Searcher.search_many` embeds all queries in batches and runs a single
+vectorised `index.search` over the stacked query matrix. `MicroBatcher`
+is an asyncio front end that gathers concurrent `search()` callers for a
+few milliseconds and answers them with one `search_many` call.
+
+Modes: "vector" (FAISS only), "lexical" (BM25 only) and "hybrid", which
+fuses both with reciprocal-rank fusion and answers keyword queries such
+as "Webb" from BM25 alone, without an embedding call.
+
+`min_score` is always a threshold on the vector score: BM25 and RRF scores
+are on other scales. In hybrid mode only documents whose vector score
+passes it are returned; lexical mode rejects it.
+"""
+import asyncio
+from dataclasses import dataclass
+
+from ann_index import prepare_vectors
+from lexical_index import rrf_fuse
+
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+
+
+@dataclass
+class SearchHit:
+    """One ranked result for one query
+
+    `distance` is what the index returned. `score` is higher-is-better:
+    cosine similarity for the cosine metric, inner product for "ip" and
+    1 / (1 + distance) for L2 (only comparable within one query). For
+    lexical hits it is the BM25 score (and `distance` is None), for fused
+    hits the RRF score.
+    """
+    id: int
+    title: str
+    distance: float | None
+    score: float
+    source: str = "vector"
+
+
+class Searcher:
+    """Embed queries and search the store, returning structured results"""
+
+    def __init__(self, store, embedder, mode="vector", fusion_candidates=20):
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode {mode!r}, expected one of {SEARCH_MODES}")
+        if mode != "vector" and not store.lexical:
+            raise ValueError(f"Search mode {mode!r} needs a store opened with lexical=True")
+        self.store = store
+        self.embedder = embedder
+        self.mode = mode
+        self.fusion_candidates = fusion_candidates
+        self.embedding_calls_skipped = 0
+
+    def _score(self, distance):
+        if self.store.metric == "l2":
+            return 1 / (1 + distance)
+        return distance
+
+    def _hits(self, distances, ids, min_score):
+        hits = []
+        for doc_id, distance in zip(ids, distances):
+            if doc_id < 0:
+                break  # fewer than k documents in the index
+            score = float(self._score(distance))
+            if min_score is not None and score < min_score:
+                break  # results are ranked, nothing further can pass
+            hits.append(SearchHit(
+                id=int(doc_id),
+                title=self.store.title(doc_id),
+                distance=float(distance),
+                score=score,
+            ))
+        return hits
+
+    def search_vectors(self, Q, k=3, min_score=None):
+        """Search with a prepared (n, d) query matrix, one list of hits per row"""
+        distances, ids = self.store.search(Q, k)
+        return [self._hits(D, I, min_score) for D, I in zip(distances, ids)]
+
+    def embed_queries(self, queries):
+        """Embed queries and prepare them for the store's metric, once"""
+        return prepare_vectors(self.embedder.embed(queries), self.store.metric)
+
+    def _lexical_hits(self, query, k):
+        return [
+            SearchHit(id=doc_id, title=self.store.title(doc_id), distance=None,
+                      score=score, source="lexical")
+            for doc_id, score in self.store.bm25.search(query, k)
+        ]
+
+    def _fuse(self, vector_hits, lexical_hits, k):
+        by_id = {hit.id: hit for hit in lexical_hits}
+        by_id.update({hit.id: hit for hit in vector_hits})
+        both = {hit.id for hit in vector_hits} & {hit.id for hit in lexical_hits}
+        fused = rrf_fuse([[hit.id for hit in vector_hits], [hit.id for hit in lexical_hits]], k)
+        return [
+            SearchHit(id=doc_id, title=by_id[doc_id].title, distance=by_id[doc_id].distance,
+                      score=score, source="hybrid" if doc_id in both else by_id[doc_id].source)
+            for doc_id, score in fused
+        ]
+
+    def search_many(self, queries, k=3, min_score=None, mode=None):
+        """Search for every query at once, one list of hits per query
+
+        Documents whose vector score is below `min_score` are dropped (see
+        the module docstring for what that means per mode).
+        """
+        queries = list(queries)
+        mode = mode or self.mode
+        if mode == "lexical" and min_score is not None:
+            raise ValueError("min_score applies to vector scores; it cannot be used in "
+                             "lexical mode")
+        if not queries:
+            return []
+        if mode == "vector":
+            return self.search_vectors(self.embed_queries(queries), k, min_score)
+        if mode == "lexical":
+            return [self._lexical_hits(query, k) for query in queries]
+
+        # hybrid: keyword queries are answered by BM25 alone, the rest are
+        # embedded together and searched with one FAISS call. A min_score
+        # needs every query's vector scores, so it turns the shortcut off.
+        results = [None] * len(queries)
+        to_embed = []
+        for i, query in enumerate(queries):
+            if min_score is None and self.store.bm25.is_keyword_query(query):
+                results[i] = self._lexical_hits(query, k)
+                self.embedding_calls_skipped += 1
+            else:
+                to_embed.append(i)
+        if to_embed:
+            n = max(k, self.fusion_candidates)
+            vector_hits = self.search_vectors(
+                self.embed_queries([queries[i] for i in to_embed]), n, min_score
+            )
+            for i, hits in zip(to_embed, vector_hits):
+                lexical = self._lexical_hits(queries[i], n)
+                if min_score is not None:
+                    # Keep BM25's votes for documents that passed on the vector side
+                    passed = {hit.id for hit in hits}
+                    lexical = [hit for hit in lexical if hit.id in passed]
+                results[i] = self._fuse(hits, lexical, k)
+        return results
+
+    def search(self, query, k=3, min_score=None, mode=None):
+        return self.search_many([query], k, min_score, mode)[0]
+
+
+class MicroBatcher:
+    """Coalesce concurrent async searches into one `search_many` call
+
+    The first caller opens a window of `max_wait_ms`; everyone who arrives
+    before it closes (up to `max_batch`) shares a single embedding request
+    and a single FAISS call, run in `executor` so the event loop stays free.
+    """
+
+    def __init__(self, searcher, max_wait_ms=2.0, max_batch=64, executor=None):
+        self.searcher = searcher
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self.executor = executor
+        self.batches = 0  # number of search_many calls made, handy for benchmarks
+        self._pending = []
+        self._full = None
+        self._flusher = None
+
+    async def search(self, query, k=3):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((query, k, future))
+        if self._flusher is None:
+            self._full = asyncio.Event()
+            self._flusher = loop.create_task(self._flush_after_window())
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return await future
+
+    async def _flush_after_window(self):
+        try:
+            await asyncio.wait_for(self._full.wait(), self.max_wait)
+        except asyncio.TimeoutError:
+            pass
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        self._flusher = None
+        if self._pending:
+            # Overflow starts the next window straight away
+            self._full = asyncio.Event()
+            self._full.set()
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_after_window())
+
+        queries = [query for query, _, _ in batch]
+        k = max(k for _, k, _ in batch)
+        loop = asyncio.get_running_loop()
+        try:
+            self.batches += 1
+            results = await loop.run_in_executor(
+                self.executor, self.searcher.search_many, queries, k
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, query_k, future), hits in zip(batch, results):
+            if not future.done():
+                future.set_result(hits[:query_k])
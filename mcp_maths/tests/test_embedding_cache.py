@@ -0,0 +1,149 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+
+from embedding_cache import CachedEmbedder, EmbeddingCache
+
+DIM = 4
+
+
+def vec(i, dim=DIM):
+    return np.full(dim, i, dtype="float32")
+
+
+def open_cache(path, model="m", **kwargs):
+    # No memory tier, so every get() reads the memory-mapped file
+    return EmbeddingCache(str(path), model, max_memory_bytes=0, **kwargs)
+
+
+def test_committed_keys_survive_a_crash(tmp_path):
+    cache = open_cache(tmp_path)
+    for i in range(10):
+        cache.put(f"t{i}", vec(i))
+        cache.commit()
+    # No close(): the process died; the log holds what index.json does not
+    reopened = open_cache(tmp_path)
+    assert len(reopened) == 10
+    for i in range(10):
+        np.testing.assert_array_equal(reopened.get(f"t{i}"), vec(i))
+
+
+def test_log_replay_after_snapshot(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.put("a", vec(1))
+    cache.commit()  # first commit writes index.json
+    cache.put("b", vec(2))
+    cache.commit()  # later ones only flush the log
+    assert glob.glob(str(tmp_path / "index-*.log"))
+
+    reopened = open_cache(tmp_path)
+    np.testing.assert_array_equal(reopened.get("a"), vec(1))
+    np.testing.assert_array_equal(reopened.get("b"), vec(2))
+
+
+def test_torn_last_log_line_is_ignored(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.put("a", vec(1))
+    cache.commit()
+    cache.put("b", vec(2))
+    cache.commit()
+    (log,) = glob.glob(str(tmp_path / "index-*.log"))
+    with open(log, "a") as f:
+        f.write("deadbeef 1")  # a write cut off before its newline
+
+    reopened = open_cache(tmp_path)
+    assert len(reopened) == 2
+    np.testing.assert_array_equal(reopened.get("b"), vec(2))
+
+
+def test_compaction_keeps_most_recent_rows(tmp_path):
+    cache = open_cache(tmp_path, max_disk_bytes=8 * 4 * DIM)
+    for i in range(20):
+        cache.put(f"t{i}", vec(i))
+    cache.close()
+
+    reopened = open_cache(tmp_path, max_disk_bytes=8 * 4 * DIM)
+    assert reopened.get("t0") is None
+    np.testing.assert_array_equal(reopened.get("t19"), vec(19))
+    assert os.path.getsize(reopened._vectors_path) <= reopened.max_disk_bytes
+    assert len(glob.glob(str(tmp_path / "vectors*.f32"))) == 1
+
+
+def test_crash_during_compaction_keeps_the_old_generation(tmp_path, monkeypatch):
+    cache = open_cache(tmp_path, max_disk_bytes=8 * 4 * DIM)
+    for i in range(8):
+        cache.put(f"t{i}", vec(i))
+    cache.close()
+
+    def crash(self):
+        raise KeyboardInterrupt
+    # The new generation's file is written, index.json is not switched yet
+    monkeypatch.setattr(EmbeddingCache, "_write_index", crash)
+    with pytest.raises(KeyboardInterrupt):
+        cache.put("t8", vec(8))
+    monkeypatch.undo()
+
+    reopened = open_cache(tmp_path, max_disk_bytes=8 * 4 * DIM)
+    assert len(reopened) == 8
+    for i in range(8):
+        np.testing.assert_array_equal(reopened.get(f"t{i}"), vec(i))
+    assert glob.glob(str(tmp_path / "vectors*.f32")) == [reopened._vectors_path]
+
+
+def test_model_change_invalidates(tmp_path):
+    cache = open_cache(tmp_path, model="a")
+    cache.put("t", vec(1))
+    cache.close()
+    assert open_cache(tmp_path, model="b").get("t") is None
+
+
+def test_dimension_change_invalidates(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.put("t", vec(1))
+    cache.close()
+    assert open_cache(tmp_path, dim=DIM + 1).get("t") is None
+
+    cache = open_cache(tmp_path)
+    cache.put("t", vec(1))
+    cache.put("u", vec(2, dim=DIM + 1))
+    assert cache.get("t") is None
+    assert cache.dim == DIM + 1
+
+
+class FakeClient:
+    model = "fake"
+
+    def __init__(self, dim=DIM):
+        self.dim = dim
+        self.calls = 0
+
+    def dimension(self):
+        return self.dim
+
+    def embed(self, texts):
+        self.calls += 1
+        return np.stack([vec(len(t), self.dim) for t in texts])
+
+    def close(self):
+        pass
+
+
+def test_cached_embedder_only_embeds_misses(tmp_path):
+    client = FakeClient()
+    embedder = CachedEmbedder(client, open_cache(tmp_path, model=client.model))
+    embedder.embed(["a", "bb"])
+    X = embedder.embed(["a", "bb", "ccc", "ccc"])
+    assert client.calls == 2
+    np.testing.assert_array_equal(X[:, 0], [1, 2, 3, 3])
+
+
+def test_cached_embedder_rejects_new_dimension(tmp_path):
+    client = FakeClient()
+    embedder = CachedEmbedder(client, open_cache(tmp_path, model=client.model))
+    embedder.embed(["a"])
+    client.dim = DIM + 2
+    with pytest.raises(ValueError, match="dimension changed"):
+        embedder.embed_into(["b"], np.zeros((1, DIM), dtype="float32"))
+    assert embedder.cache.get("a") is None
@@ -0,0 +1,148 @@
+import json
+import os
+
+import faiss
+import numpy as np
+import pytest
+
+import index_store
+from index_store import IndexStore
+from ingest import ingest_files
+
+DIM = 8
+
+
+def vectors(n, seed=0):
+    return np.random.default_rng(seed).random((n, DIM)).astype("float32")
+
+
+def faiss_ids(store):
+    return sorted(faiss.vector_to_array(store.index.id_map).tolist())
+
+
+def test_titles_past_the_last_save_are_dropped(tmp_path):
+    store = IndexStore(str(tmp_path))
+    store.add(["a", "b"], vectors(2))
+    store.save()
+    store.add(["c"], vectors(1, seed=1))  # never saved: the process died
+
+    reopened = IndexStore(str(tmp_path))
+    assert reopened.next_id == 2
+    assert [title for _, title in reopened.docs.items()] == ["a", "b"]
+    ids = reopened.add(["d"], vectors(1, seed=2))
+    assert ids.tolist() == [2]
+    assert reopened.title(2) == "d"
+
+
+def test_crash_inside_save_keeps_the_previous_generation(tmp_path, monkeypatch):
+    store = IndexStore(str(tmp_path), lexical=True)
+    store.add(["alpha", "beta"], vectors(2))
+    store.save()
+    store.add(["gamma"], vectors(1, seed=1))
+
+    # FAISS and BM25 files of the next generation are written, meta.json is not
+    real_dump = json.dump
+
+    def crash(obj, f, *args, **kwargs):
+        if "next_id" in obj:
+            raise KeyboardInterrupt
+        return real_dump(obj, f, *args, **kwargs)
+    monkeypatch.setattr(index_store.json, "dump", crash)
+    with pytest.raises(KeyboardInterrupt):
+        store.save()
+    monkeypatch.undo()
+
+    reopened = IndexStore(str(tmp_path))
+    assert reopened.ntotal == 2 and len(reopened.docs) == 2
+    reopened.add(["delta"], vectors(1, seed=2))
+    reopened.save()
+    reopened = IndexStore(str(tmp_path))
+    assert faiss_ids(reopened) == [0, 1, 2]
+    assert reopened.title(2) == "delta"
+    assert sorted(reopened.bm25.doc_lengths) == [0, 1, 2]
+
+
+def test_save_replaces_the_previous_generation(tmp_path):
+    store = IndexStore(str(tmp_path), lexical=True)
+    store.add(["a"], vectors(1))
+    store.save()
+    store.add(["b"], vectors(1, seed=1))
+    store.save()
+    files = sorted(f for f in os.listdir(tmp_path) if f.startswith(("index", "lexical")))
+    assert files == ["index-2.faiss", "lexical-2.json"]
+
+
+def test_state_is_saved_with_the_index(tmp_path):
+    store = IndexStore(str(tmp_path))
+    store.add(["a"], vectors(1))
+    store.state["ingest"] = {"f": {"position": 1, "done": False}}
+    store.save()
+    assert IndexStore(str(tmp_path)).state == store.state
+
+
+def test_interrupted_ingest_resumes_without_duplicates(tmp_path):
+    source = tmp_path / "docs.txt"
+    source.write_text("\n".join(f"doc {i}" for i in range(30)))
+
+    class Embedder:
+        def __init__(self, fail_after=None):
+            self.calls = 0
+            self.fail_after = fail_after
+
+        def dimension(self):
+            return DIM
+
+        def embed_into(self, texts, out):
+            self.calls += 1
+            if self.fail_after is not None and self.calls > self.fail_after:
+                raise KeyboardInterrupt
+            for i, text in enumerate(texts):
+                out[i] = int(text.split()[1])
+
+    index_dir = str(tmp_path / "index")
+    with pytest.raises(KeyboardInterrupt):
+        ingest_files([str(source)], IndexStore(index_dir), Embedder(fail_after=3),
+                     batch_size=4, save_every=2)
+    store = IndexStore(index_dir)
+    ingest_files([str(source)], store, Embedder(), batch_size=4, save_every=2)
+
+    store = IndexStore(index_dir)
+    titles = [title for _, title in store.docs.items()]
+    assert titles == [f"doc {i}" for i in range(30)]
+    assert faiss_ids(store) == list(range(30))
+
+
+def test_remove_keeps_titles_bm25_and_faiss_in_step(tmp_path):
+    store = IndexStore(str(tmp_path), lexical=True)
+    store.add(["red apple", "green pear", "red pear"], vectors(3))
+    assert store.remove([1, 7]) == 1
+    assert store.title(1) is None
+    assert faiss_ids(store) == [0, 2]
+    assert [doc_id for doc_id, _ in store.bm25.search("pear", 5)] == [2]
+
+
+def test_hnsw_removal_is_rejected_before_anything_changes(tmp_path):
+    store = IndexStore(str(tmp_path), kind="hnsw", lexical=True)
+    store.add(["red apple", "green pear"], vectors(2))
+    with pytest.raises(RuntimeError):
+        store.remove([0])
+    assert len(store.docs) == 2 and store.ntotal == 2
+    assert store.bm25.search("apple", 5)
+
+
+def test_opens_stores_saved_before_generations(tmp_path):
+    store = IndexStore(str(tmp_path))
+    store.add(["a", "b"], vectors(2))
+    store.save()
+    meta_path = tmp_path / "meta.json"
+    meta = json.loads(meta_path.read_text())
+    os.rename(tmp_path / meta.pop("index_file"), tmp_path / "index.faiss")
+    for key in ("generation", "lexical_file", "state"):
+        meta.pop(key)
+    meta_path.write_text(json.dumps(meta))
+
+    legacy = IndexStore(str(tmp_path))
+    assert legacy.ntotal == 2
+    legacy.save()
+    assert not os.path.exists(tmp_path / "index.faiss")
+    assert IndexStore(str(tmp_path)).ntotal == 2
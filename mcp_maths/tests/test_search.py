@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from index_store import IndexStore
+from lexical_index import BM25Index, rrf_fuse, tokenize
+from searcher import Searcher
+
+TITLES = ["James Webb telescope images", "5G rollout in Europe", "Climate change report",
+          "Cooking pasta at home", "Change management and climate"]
+
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    assert tokenize("The Webb telescope, and 5G!") == ["webb", "telescope", "5g"]
+
+
+def test_bm25_ranks_rarer_and_repeated_terms_higher():
+    index = BM25Index()
+    index.add([0, 1, 2], ["red apple", "red red pear", "green pear"])
+    assert [doc_id for doc_id, _ in index.search("red", 3)] == [1, 0]
+    # "apple" is rarer than "red", so it decides the ranking
+    assert index.search("red apple", 3)[0][0] == 0
+    assert index.search("banana", 3) == []
+
+
+def test_bm25_remove_and_round_trip(tmp_path):
+    index = BM25Index()
+    index.add([0, 1], ["red apple", "green pear"])
+    index.remove([0], ["red apple"])
+    assert index.search("apple", 3) == []
+    path = str(tmp_path / "lexical.json")
+    index.save(path)
+    loaded = BM25Index.load(path)
+    assert loaded.search("pear", 3) == index.search("pear", 3)
+    assert loaded.search("pear", 3)[0][0] == 1
+
+
+def test_keyword_queries_are_single_terms_or_codes():
+    index = BM25Index()
+    index.add(range(len(TITLES)), TITLES)
+    assert index.is_keyword_query("Webb")
+    assert index.is_keyword_query("5G")
+    assert not index.is_keyword_query("climate change")
+    assert not index.is_keyword_query("quantum")  # not indexed
+    assert not index.is_keyword_query("")
+
+
+def test_rrf_fuse_sums_reciprocal_ranks():
+    fused = dict(rrf_fuse([[1, 2, 3], [3, 1]], k=3, c=60))
+    assert fused[1] == pytest.approx(1 / 61 + 1 / 62)
+    assert fused[3] == pytest.approx(1 / 63 + 1 / 61)
+    assert fused[2] == pytest.approx(1 / 62)
+    assert [doc_id for doc_id, _ in rrf_fuse([[1, 2, 3], [3, 1]], k=2)] == [1, 3]
+
+
+class Embedder:
+    """Queries about climate point at document 2, anything else elsewhere"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed(self, queries):
+        self.calls += 1
+        out = np.zeros((len(queries), len(TITLES)), dtype="float32")
+        for i, query in enumerate(queries):
+            if "climate" in query.lower():
+                out[i, 2], out[i, 4] = 1.0, 0.5
+            else:
+                out[i, 3] = 1.0
+        return out
+
+
+@pytest.fixture
+def searcher(tmp_path):
+    store = IndexStore(str(tmp_path), metric="cosine", lexical=True)
+    store.add(TITLES, np.eye(len(TITLES), dtype="float32"))
+    return Searcher(store, Embedder(), mode="hybrid")
+
+
+def test_hybrid_answers_keyword_queries_without_embedding(searcher):
+    hits = searcher.search("Webb", k=3)
+    assert [hit.id for hit in hits] == [0]
+    assert hits[0].source == "lexical"
+    assert searcher.embedder.calls == 0
+    assert searcher.embedding_calls_skipped == 1
+
+
+def test_hybrid_fuses_vector_and_bm25_hits(searcher):
+    hits = searcher.search("climate change", k=3)
+    assert searcher.embedder.calls == 1
+    assert hits[0].id == 2 and hits[0].source == "hybrid"
+    assert {hit.id for hit in hits} >= {2, 4}
+
+
+def test_min_score_filters_on_the_vector_score_in_hybrid(searcher):
+    hits = searcher.search("climate change", k=5, min_score=0.8)
+    # Document 4 matches both BM25 terms but its cosine (0.45) is below the threshold
+    assert [hit.id for hit in hits] == [2]
+    assert hits[0].distance >= 0.8
+
+
+def test_min_score_turns_off_the_keyword_shortcut(searcher):
+    # BM25's only match (document 0) has no vector score that passes
+    assert [hit.id for hit in searcher.search("Webb", k=3, min_score=0.5)] == [3]
+    assert searcher.embedder.calls == 1
+
+
+def test_min_score_is_rejected_in_lexical_mode(searcher):
+    with pytest.raises(ValueError, match="lexical"):
+        searcher.search("Webb", min_score=0.5, mode="lexical")
+
+
+def test_vector_mode_min_score(searcher):
+    hits = searcher.search("climate", k=5, min_score=0.4, mode="vector")
+    assert [hit.id for hit in hits] == [2, 4]
+    assert all(hit.score >= 0.4 for hit in hits)
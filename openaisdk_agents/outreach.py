@@ -0,0 +1,247 @@
+"""
+Sales outreach from sales_outreach.ipynb as an importable, concurrent module.
+
+For each prospect the three sales agents draft an email at the same time
+(`asyncio.gather`), then a picker agent chooses the best draft. Prospects
+are processed in parallel too, with two limits:
+
+    prospect_concurrency   prospects in progress at once
+    concurrency            model calls in flight at once, across all prospects
+
+`FakeModelProvider` answers with canned drafts after a simulated latency, so
+the fan-out can be benchmarked offline without an API key:
+
+    python outreach.py --fake --prospects 24 --latency 1.0 --compare
+    python outreach.py --prospects-file prospects.txt          # real models
+    python outreach.py --prospects-file prospects.txt --send   # and email the winners
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from dataclasses import dataclass
+
+from agents import Agent, Runner, RunConfig, Usage, trace
+from agents.items import ModelResponse
+from agents.models.interface import Model, ModelProvider
+from openai.types.responses import (Response, ResponseCompletedEvent, ResponseOutputMessage,
+                                   ResponseOutputText)
+from pydantic import BaseModel
+
+MODEL = "gpt-4o-mini"
+
+instructions1 = "You are a sales agent working for ComplAI, \
+a company that provides a SaaS tool for ensuring SOC2 compliance and preparing for audits, powered by AI. \
+You write professional, serious cold emails."
+
+instructions2 = "You are a humorous, engaging sales agent working for ComplAI, \
+a company that provides a SaaS tool for ensuring SOC2 compliance and preparing for audits, powered by AI. \
+You write witty, engaging cold emails that are likely to get a response."
+
+instructions3 = "You are a busy sales agent working for ComplAI, \
+a company that provides a SaaS tool for ensuring SOC2 compliance and preparing for audits, powered by AI. \
+You write concise, to the point cold emails."
+
+picker_instructions = "You pick the best cold sales email from several drafts. \
+Imagine you are the recipient: choose the one you would most likely reply to. \
+Give the number of the best draft and a one-sentence reason."
+
+
+class Pick(BaseModel):
+    best: int
+    reason: str
+
+
+def sales_agents(model=MODEL):
+    return [
+        Agent(name="Professional Sales Agent", instructions=instructions1, model=model),
+        Agent(name="Engaging Sales Agent", instructions=instructions2, model=model),
+        Agent(name="Busy Sales Agent", instructions=instructions3, model=model),
+    ]
+
+
+def picker_agent(model=MODEL):
+    return Agent(name="Sales Picker", instructions=picker_instructions, model=model,
+                 output_type=Pick)
+
+
+@dataclass
+class Outreach:
+    prospect: str
+    drafts: list[str]
+    best: int          # index into drafts
+    reason: str
+    elapsed: float
+
+    @property
+    def email(self):
+        return self.drafts[self.best]
+
+
+async def _run(agent, prompt, limiter, run_config):
+    """One agent run, holding a slot of the model-call limit"""
+    async with limiter:
+        return await Runner.run(agent, prompt, run_config=run_config)
+
+
+async def draft_and_pick(prospect, agents, picker, limiter, run_config=None):
+    """All drafts for one prospect concurrently, then the picker's choice"""
+    start = time.perf_counter()
+    prompt = f"Write a cold sales email to {prospect}"
+    results = await asyncio.gather(*(_run(agent, prompt, limiter, run_config)
+                                     for agent in agents))
+    drafts = [str(result.final_output) for result in results]
+
+    numbered = "\n\n".join(f"Draft {i}:\n{draft}" for i, draft in enumerate(drafts, 1))
+    pick = (await _run(picker, f"Recipient: {prospect}\n\n{numbered}", limiter,
+                       run_config)).final_output
+    best = pick.best - 1 if 1 <= pick.best <= len(drafts) else 0
+    return Outreach(prospect, drafts, best, pick.reason, time.perf_counter() - start)
+
+
+async def run_campaign(prospects, concurrency=8, prospect_concurrency=4, model=MODEL,
+                       run_config=None, on_done=None):
+    """Outreach for every prospect, in input order
+
+    `on_done(outreach)` is awaited as each prospect finishes.
+    """
+    agents, picker = sales_agents(model), picker_agent(model)
+    limiter = asyncio.Semaphore(concurrency)
+    prospect_slots = asyncio.Semaphore(prospect_concurrency)
+    disabled = run_config is not None and run_config.tracing_disabled
+
+    async def one(prospect):
+        async with prospect_slots:
+            with trace(f"Outreach: {prospect}", disabled=disabled):
+                outreach = await draft_and_pick(prospect, agents, picker, limiter, run_config)
+        if on_done is not None:
+            await on_done(outreach)
+        return outreach
+
+    return await asyncio.gather(*(one(prospect) for prospect in prospects))
+
+
+def _send_email_sync(subject, body, from_email, to_email):
+    import sendgrid  # optional dependency, only needed for --send
+    from sendgrid.helpers.mail import Content, Email, Mail, To
+
+    sg = sendgrid.SendGridAPIClient(api_key=os.environ["SENDGRID_API_KEY"])
+    mail = Mail(Email(from_email), To(to_email), subject, Content("text/plain", body)).get()
+    return sg.client.mail.send.post(request_body=mail).status_code
+
+
+async def send_email(body, subject="Sales email", from_email=None, to_email=None):
+    """Send with SendGrid in a worker thread, so other prospects keep going"""
+    return await asyncio.to_thread(_send_email_sync, subject, body,
+                                   from_email or os.environ["SENDGRID_FROM"],
+                                   to_email or os.environ["SENDGRID_TO"])
+
+
+# Offline model for benchmarking: fixed drafts after a simulated latency
+
+class FakeModel(Model):
+    def __init__(self, latency=1.0, jitter=0.2, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    async def get_response(self, system_instructions, input, model_settings, tools,
+                           output_schema, handoffs, tracing, *, previous_response_id=None,
+                           conversation_id=None, prompt=None):
+        self.calls += 1
+        await asyncio.sleep(self.latency * (1 + self.rng.uniform(-self.jitter, self.jitter)))
+        text = input if isinstance(input, str) else str(input[-1].get("content", ""))
+        if output_schema is not None:
+            reply = json.dumps({"best": self.rng.randint(1, 3), "reason": "Most likely to get a reply"})
+        else:
+            reply = f"Subject: SOC2 without the pain\n\n{text.split(' to ', 1)[-1]}, " \
+                    f"ComplAI gets you audit-ready in weeks.\n\n(drafted as: {system_instructions[:40]}...)"
+        message = ResponseOutputMessage(
+            id=f"fake-{self.calls}", type="message", role="assistant", status="completed",
+            content=[ResponseOutputText(type="output_text", text=reply, annotations=[])])
+        return ModelResponse(output=[message], usage=Usage(requests=1), response_id=None)
+
+    async def stream_response(self, system_instructions, input, model_settings, tools,
+                              output_schema, handoffs, tracing, *, previous_response_id=None,
+                              conversation_id=None, prompt=None):
+        """The get_response answer as one response.completed event, for Runner.run_streamed"""
+        result = await self.get_response(system_instructions, input, model_settings, tools,
+                                         output_schema, handoffs, tracing)
+        response = Response(id=f"fake-{self.calls}", created_at=time.time(), model="fake",
+                            object="response", output=result.output, tool_choice="auto",
+                            tools=[], parallel_tool_calls=False)
+        yield ResponseCompletedEvent(type="response.completed", response=response,
+                                     sequence_number=0)
+
+
+class FakeModelProvider(ModelProvider):
+    def __init__(self, latency=1.0, jitter=0.2):
+        self.model = FakeModel(latency, jitter)
+
+    def get_model(self, model_name):
+        return self.model
+
+
+def fake_run_config(latency=1.0, jitter=0.2):
+    return RunConfig(model_provider=FakeModelProvider(latency, jitter), tracing_disabled=True)
+
+
+async def timed_campaign(prospects, label, **kwargs):
+    start = time.perf_counter()
+    results = await run_campaign(prospects, **kwargs)
+    elapsed = time.perf_counter() - start
+    drafts = sum(len(r.drafts) for r in results)
+    print(f"{label:<28}{len(prospects):>10}{drafts:>8}{elapsed:>10.2f}"
+          f"{drafts / elapsed * 60:>12.1f}")
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Concurrent sales outreach")
+    parser.add_argument("--prospects-file", help="one prospect per line")
+    parser.add_argument("--prospects", type=int, default=12,
+                        help="number of made-up prospects when no file is given")
+    parser.add_argument("--concurrency", type=int, default=8, help="model calls in flight")
+    parser.add_argument("--prospect-concurrency", type=int, default=4)
+    parser.add_argument("--fake", action="store_true", help="offline fake model provider")
+    parser.add_argument("--latency", type=float, default=1.0, help="fake model latency (s)")
+    parser.add_argument("--compare", action="store_true",
+                        help="also run one call at a time, as the notebook does")
+    parser.add_argument("--send", action="store_true", help="email each chosen draft")
+    args = parser.parse_args()
+
+    if args.prospects_file:
+        with open(args.prospects_file) as f:
+            prospects = [line.strip() for line in f if line.strip()]
+    else:
+        prospects = [f"the CTO of Company {i}" for i in range(1, args.prospects + 1)]
+
+    if not args.fake:
+        from dotenv import load_dotenv
+        load_dotenv(override=True)
+
+    def config():
+        return fake_run_config(args.latency) if args.fake else None
+
+    async def on_done(outreach):
+        print(f"  {outreach.prospect}: draft {outreach.best + 1} ({outreach.reason}) "
+              f"in {outreach.elapsed:.2f}s")
+        if args.send:
+            status = await send_email(outreach.email)
+            print(f"    sent, status {status}")
+
+    print(f"{'run':<28}{'prospects':>10}{'drafts':>8}{'time s':>10}{'drafts/min':>12}")
+    if args.compare:
+        await timed_campaign(prospects, "sequential (notebook)", concurrency=1,
+                             prospect_concurrency=1, run_config=config())
+    await timed_campaign(prospects, f"parallel ({args.concurrency} calls)",
+                         concurrency=args.concurrency,
+                         prospect_concurrency=args.prospect_concurrency,
+                         run_config=config(), on_done=on_done)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
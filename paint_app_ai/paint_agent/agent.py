@@ -0,0 +1,187 @@
+"""
+Agent loop over an MCP ClientSession with structured tool calling.
+
+Each model turn may request several tool calls. They are executed
+concurrently with `asyncio.gather` and all results go back to the model in
+the next turn, so N independent calls cost one LLM round trip instead of N.
+The prompt for each turn comes from an `AgentContext`, which keeps it under
+a token budget with a stable prefix. Arguments are validated against the
+tool's compiled schema before anything is sent to the server.
+
+Progress notifications from long-running tools are printed and recorded as
+they arrive, and while tools run the LLM adapter gets to `prepare()` the
+parts of the next request that do not depend on their results.
+
+Every run is traced (see tracing.py): an agent.run span with llm.generate,
+llm.prepare, tool.coerce and mcp.call_tool spans underneath.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+import config
+from context import AgentContext
+from tool_registry import ToolArgumentError, as_registry
+from tracing import tracer
+
+_W, _H = config.CANVAS_WIDTH, config.CANVAS_HEIGHT
+
+SYSTEM_PROMPT = f"""You are a drawing agent solving tasks in iterations. You have access to drawing and math tools through function calling.
+
+Canvas information:
+- Canvas size: {_W}x{_H} pixels (not screen size!)
+- Good rectangle coordinates: ({_W // 4}, {_H // 4}) to ({_W * 3 // 4}, {_H * 3 // 4})
+- Text will be automatically centered inside the rectangle
+
+Rules:
+- ALWAYS call open_drawing_app before any drawing, and pass the canvas_id it
+  returns to every drawing call
+- Use draw_batch to draw several shapes in a single call
+- All function calls you return in one turn run at the same time, so put
+  independent calls in the same turn and wait for results before making
+  calls that depend on them
+- Do not repeat function calls with the same parameters
+- When every step is done, reply with a short final answer and no function calls"""
+
+
+@dataclass
+class ProgressEvent:
+    elapsed: float  # seconds since the agent started
+    tool: str
+    progress: float
+    total: float | None
+    message: str | None
+
+
+@dataclass
+class AgentResult:
+    final_answer: str | None
+    iterations: int
+    llm_calls: int
+    tool_calls: int
+    elapsed: float
+    messages: list = field(default_factory=list)  # full transcript
+    prompt_sizes: list = field(default_factory=list)  # (messages, approx tokens) per turn
+    progress: list = field(default_factory=list)  # ProgressEvents, in arrival order
+
+
+def format_tool_result(result):
+    """Flatten an MCP CallToolResult into text for the model"""
+    prefix = "Error: " if getattr(result, "isError", False) else ""
+    if hasattr(result, "content") and isinstance(result.content, list):
+        parts = [
+            item.text if hasattr(item, "text")
+            # Never paste base64 image data into the prompt
+            else f"[{item.mimeType}, {len(item.data) * 3 // 4} bytes]" if hasattr(item, "mimeType")
+            else str(item)
+            for item in result.content
+        ]
+        return prefix + ", ".join(parts)
+    return prefix + str(result)
+
+
+async def call_tool(session, call, registry, on_progress=None):
+    """Run one tool call over MCP, returning its result as text
+
+    `on_progress(call, progress, total, message)` is awaited for every
+    progress notification the tool sends before it finishes.
+    """
+    try:
+        # Bad arguments are answered locally, without a round trip
+        with tracer.span("tool.coerce", tool=call.name):
+            arguments = registry.coerce(call.name, call.args)
+    except ToolArgumentError as e:
+        return f"Error: invalid arguments for {call.name}: {e}"
+    try:
+        async def report_progress(progress, total, message):
+            await on_progress(call, progress, total, message)
+
+        with tracer.span("mcp.call_tool", tool=call.name) as span:
+            result = await session.call_tool(
+                call.name, arguments=arguments,
+                progress_callback=report_progress if on_progress is not None else None)
+            span.attrs["is_error"] = bool(result.isError)
+        return format_tool_result(result)
+    except Exception as e:
+        return f"Error: {e}"
+
+
+async def execute_tool_calls(session, calls, registry, on_progress=None):
+    """Run all tool calls of one model turn concurrently, results in call order"""
+    return await asyncio.gather(*(call_tool(session, call, registry, on_progress)
+                                  for call in calls))
+
+
+async def run_agent(session, llm, query, tools, system_prompt=SYSTEM_PROMPT, max_iterations=10,
+                    window=4, token_budget=4000, prepare_ahead=True):
+    """Drive `llm` until it answers without tool calls or `max_iterations` is hit
+
+    `tools` is a ToolRegistry, or a list_tools() result to build one from.
+    """
+    with tracer.span("agent.run"):
+        return await _run_agent(session, llm, query, tools, system_prompt, max_iterations,
+                                window, token_budget, prepare_ahead)
+
+
+async def _run_agent(session, llm, query, tools, system_prompt, max_iterations, window,
+                     token_budget, prepare_ahead):
+    registry = as_registry(tools)
+    specs = registry.specs
+    context = AgentContext(system_prompt, specs, query, window=window, token_budget=token_budget)
+    messages = [{"role": "user", "text": query}]
+    start = time.perf_counter()
+    tool_call_count = 0
+    final_answer = None
+    progress = []
+
+    async def on_progress(call, value, total, message):
+        event = ProgressEvent(time.perf_counter() - start, call.name, value, total, message)
+        progress.append(event)
+        of_total = f"/{total:g}" if total else ""
+        print(f"  [{call.name} {value:g}{of_total}] {message or ''}")
+
+    iteration = 0
+    while iteration < max_iterations:
+        iteration += 1
+        print(f"\n--- Iteration {iteration} ---")
+        prompt = context.messages()
+        print(f"Prompt: {len(prompt)} messages, ~{context.sizes[-1][1]} tokens")
+        with tracer.span("llm.generate", iteration=iteration):
+            turn = await llm.generate(system_prompt, prompt, specs)
+        model_message = {"role": "model", "turn": turn}
+        messages.append(model_message)
+
+        if not turn.tool_calls:
+            final_answer = turn.text.strip() or "Task completed"
+            print(f"FINAL_ANSWER: {final_answer}")
+            break
+
+        for call in turn.tool_calls:
+            print(f"Calling {call.name} with {call.args}")
+        running = asyncio.ensure_future(
+            execute_tool_calls(session, turn.tool_calls, registry, on_progress))
+        if prepare_ahead and hasattr(llm, "prepare"):
+            # The next prompt starts with everything sent so far plus this turn
+            with tracer.span("llm.prepare", iteration=iteration):
+                await llm.prepare(system_prompt, prompt + [model_message], specs)
+        results = await running
+        tool_call_count += len(turn.tool_calls)
+        for call, result in zip(turn.tool_calls, results):
+            print(f"Result of {call.name}: {result}")
+        tool_message = {"role": "tool", "results": list(zip(turn.tool_calls, results))}
+        messages.append(tool_message)
+        context.add_step(model_message, tool_message)
+    else:
+        print(f"\nReached maximum iterations ({max_iterations})")
+
+    return AgentResult(
+        final_answer=final_answer,
+        iterations=iteration,
+        llm_calls=iteration,
+        tool_calls=tool_call_count,
+        elapsed=time.perf_counter() - start,
+        messages=messages,
+        prompt_sizes=context.sizes,
+        progress=progress,
+    )
+
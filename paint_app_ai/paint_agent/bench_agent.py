@@ -0,0 +1,130 @@
+"""
+Round trips and wall-clock time: one tool call per turn vs parallel calls,
+then the same run with the LLM response cache (cold, warm, replayed), and
+a recorded drawing run replayed against the real drawing server.
+
+Uses a scripted fake LLM and an in-memory MCP server with a slow tool, so it
+needs neither an API key nor a subprocess:
+
+    python bench_agent.py --calls 5 --llm-latency 0.5 --tool-latency 0.2
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from agent import run_agent
+from llm import LLMTurn, ScriptedLLM, ToolCall
+from llm_cache import CachedLLM, ResponseCache
+
+
+def make_server(tool_latency):
+    mcp = FastMCP("bench-server")
+
+    @mcp.tool()
+    async def slow_add(a: int, b: int) -> int:
+        """Add two numbers, slowly"""
+        await asyncio.sleep(tool_latency)
+        return a + b
+
+    return mcp
+
+
+async def run(script, server, llm_latency, llm=None):
+    llm = llm or ScriptedLLM(script, latency=llm_latency)
+    async with create_connected_server_and_client_session(server._mcp_server) as session:
+        tools = (await session.list_tools()).tools
+        return await run_agent(session, llm, "Add the pairs", tools, max_iterations=len(script) + 1)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=5, help="independent tool calls in the task")
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--tool-latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server = make_server(args.tool_latency)
+    calls = [ToolCall("slow_add", {"a": i, "b": i}) for i in range(args.calls)]
+
+    # Old protocol: exactly one FUNCTION_CALL line per model turn
+    sequential = await run([LLMTurn(tool_calls=[c]) for c in calls], server, args.llm_latency)
+    # Native function calling: every independent call in one turn
+    parallel = await run([LLMTurn(tool_calls=list(calls))], server, args.llm_latency)
+
+    print(f"\n{args.calls} independent calls | LLM {args.llm_latency * 1000:.0f} ms | "
+          f"tool {args.tool_latency * 1000:.0f} ms\n")
+    print(f"{'mode':<22}{'LLM calls':>10}{'tool calls':>12}{'wall s':>9}{'max prompt tok':>16}")
+    for name, result in (("one call per turn", sequential), ("parallel tool calls", parallel)):
+        max_tokens = max(tokens for _, tokens in result.prompt_sizes)
+        print(f"{name:<22}{result.llm_calls:>10}{result.tool_calls:>12}{result.elapsed:>9.2f}"
+              f"{max_tokens:>16}")
+    print(f"\nSpeedup: {sequential.elapsed / parallel.elapsed:.1f}x")
+
+    await bench_cache(calls, server, args.llm_latency)
+    await bench_drawing_replay(args.llm_latency)
+
+
+async def bench_cache(calls, server, llm_latency):
+    """Cold vs warm cache, coalesced concurrent runs and offline replay"""
+    script = [LLMTurn(tool_calls=[c]) for c in calls]
+    recording = os.path.join(tempfile.mkdtemp(), "recording.jsonl")
+    cache = ResponseCache()
+
+    print(f"\n{'cache':<22}{'LLM calls':>10}{'upstream':>10}{'wall s':>9}")
+    cold = CachedLLM(ScriptedLLM(script, latency=llm_latency), cache, "record", recording)
+    result = await run(script, server, llm_latency, cold)
+    print(f"{'cold (recording)':<22}{cold.calls:>10}{cold.upstream:>10}{result.elapsed:>9.2f}")
+
+    warm = CachedLLM(ScriptedLLM(script, latency=llm_latency), cache)
+    result = await run(script, server, llm_latency, warm)
+    print(f"{'warm':<22}{warm.calls:>10}{warm.upstream:>10}{result.elapsed:>9.2f}")
+
+    # Four identical runs at once against an empty cache share each model call
+    shared = CachedLLM(ScriptedLLM(script, latency=llm_latency), ResponseCache())
+    start = time.perf_counter()
+    await asyncio.gather(*(run(script, server, llm_latency, shared) for _ in range(4)))
+    print(f"{'4 runs coalesced':<22}{shared.calls:>10}{shared.upstream:>10}"
+          f"{time.perf_counter() - start:>9.2f}")
+
+    # No model at all: every turn must come from the recording
+    replay = CachedLLM(ScriptedLLM([]), mode="replay", recording_path=recording)
+    result = await run(script, server, llm_latency, replay)
+    print(f"{'replay':<22}{replay.calls:>10}{replay.upstream:>10}{result.elapsed:>9.2f}")
+
+
+async def bench_drawing_replay(llm_latency):
+    """Record a drawing run, then replay it on a fresh session of the drawing server
+
+    Tool results (canvas ids, export paths) are part of every later prompt,
+    so replay only works if a fresh session produces the same results.
+    """
+    from drawing_mcp_server import mcp as drawing_server
+
+    def script():
+        return [LLMTurn(tool_calls=[ToolCall("open_drawing_app", {})]),
+                LLMTurn(tool_calls=[ToolCall("draw_rectangle", {"canvas_id": "canvas-1",
+                                                                "x1": 200, "y1": 150,
+                                                                "x2": 600, "y2": 450}),
+                                    ToolCall("add", {"a": 50, "b": 75})]),
+                LLMTurn(tool_calls=[ToolCall("add_text_in_drawing_app",
+                                             {"canvas_id": "canvas-1", "text": "125"})])]
+
+    recording = os.path.join(tempfile.mkdtemp(), "drawing.jsonl")
+    print(f"\n{'drawing server':<22}{'LLM calls':>10}{'upstream':>10}{'wall s':>9}")
+    recorder = CachedLLM(ScriptedLLM(script(), latency=llm_latency), ResponseCache(),
+                         "record", recording)
+    result = await run(script(), drawing_server, llm_latency, recorder)
+    print(f"{'recorded':<22}{recorder.calls:>10}{recorder.upstream:>10}{result.elapsed:>9.2f}")
+
+    replay = CachedLLM(ScriptedLLM([]), mode="replay", recording_path=recording)
+    result = await run(script(), drawing_server, llm_latency, replay)
+    print(f"{'replayed':<22}{replay.calls:>10}{replay.upstream:>10}{result.elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""
+MCP round trips for drawing: one call per primitive vs one draw_batch call.
+
+Talks to the real drawing server tools over an in-memory MCP session (a
+stdio subprocess adds its own pipe and JSON cost on top of every call):
+
+    python bench_drawing.py --shapes 200
+"""
+import argparse
+import asyncio
+import random
+import re
+import time
+
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from drawing_mcp_server import mcp
+
+
+def random_ops(count, width=800, height=600, seed=0):
+    rng = random.Random(seed)
+    ops = []
+    for i in range(count):
+        x1, y1 = rng.randrange(width - 50), rng.randrange(height - 50)
+        x2, y2 = x1 + rng.randrange(10, 50), y1 + rng.randrange(10, 50)
+        kind = ("rectangle", "ellipse", "line", "text")[i % 4]
+        if kind == "line":
+            ops.append({"op": "line", "points": [[x1, y1], [x2, y2]], "width": 2})
+        elif kind == "text":
+            ops.append({"op": "text", "x": x1, "y": y1, "text": str(i), "size": 12})
+        else:
+            ops.append({"op": kind, "x1": x1, "y1": y1, "x2": x2, "y2": y2, "width": 2})
+    return ops
+
+
+async def new_canvas(session):
+    result = await session.call_tool("open_drawing_app", {})
+    return re.search(r"canvas_id=(\S+)", result.content[0].text).group(1)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--shapes", type=int, default=200)
+    args = parser.parse_args()
+    ops = random_ops(args.shapes)
+
+    async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+        single_id = await new_canvas(session)
+        start = time.perf_counter()
+        for op in ops:
+            await session.call_tool("draw_batch", {"canvas_id": single_id, "ops": [op]})
+        single = time.perf_counter() - start
+
+        batch_id = await new_canvas(session)
+        start = time.perf_counter()
+        await session.call_tool("draw_batch", {"canvas_id": batch_id, "ops": ops})
+        batch = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await session.call_tool("render_canvas", {"canvas_id": batch_id, "scale": 2.0})
+        rerender = time.perf_counter() - start
+
+        renders = [await session.call_tool("render_canvas", {"canvas_id": canvas_id})
+                   for canvas_id in (single_id, batch_id)]
+    same = renders[0].content[0].data == renders[1].content[0].data
+    print(f"\n{args.shapes} shapes, identical result: {same}\n")
+    print(f"{'mode':<24}{'MCP calls':>10}{'total ms':>10}{'ms/shape':>10}")
+    print(f"{'one call per shape':<24}{args.shapes:>10}{single * 1000:>10.1f}"
+          f"{single * 1000 / args.shapes:>10.3f}")
+    print(f"{'draw_batch':<24}{1:>10}{batch * 1000:>10.1f}{batch * 1000 / args.shapes:>10.3f}")
+    print(f"\nSpeedup: {single / batch:.1f}x; re-render at 2x from display list: "
+          f"{rerender * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""
+Tasks per second: a fresh MCP server per task vs a pool of warm sessions.
+
+Spawns itself as a small stdio MCP server (`python bench_runner.py serve`)
+and drives it with a scripted fake LLM, so it needs no API key:
+
+    python bench_runner.py --tasks 20 --pool 4 --llm-latency 0.1
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from mcp import StdioServerParameters
+from mcp.server.fastmcp import FastMCP
+
+from agent import run_agent
+from llm import LLMTurn, ScriptedLLM, ToolCall
+from runner import SessionPool, TaskState, report, run_tasks, stdio_session
+from tool_registry import discover_tools
+
+SERVER_PARAMS = StdioServerParameters(command=sys.executable, args=[__file__, "serve"])
+
+
+def serve():
+    mcp = FastMCP("bench-runner-server", log_level="WARNING")
+
+    @mcp.tool()
+    def add(a: int, b: int) -> int:
+        """Add two numbers"""
+        return a + b
+
+    mcp.run(transport="stdio")
+
+
+def make_llm(latency):
+    return lambda: ScriptedLLM([LLMTurn(tool_calls=[ToolCall("add", {"a": 50, "b": 75})])],
+                               latency=latency)
+
+
+async def fresh_per_task(queries, make, concurrency):
+    """Old behaviour: spawn, initialise and list tools for every task"""
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(i, query):
+        state = TaskState(i, query)
+        async with limit:
+            state.started_at = time.perf_counter()
+            try:
+                async with stdio_session(SERVER_PARAMS) as session:
+                    tools = await discover_tools(session)
+                    state.result = await run_agent(session, make(), query, tools)
+            except Exception as e:
+                state.error = f"{type(e).__name__}: {e}"
+            state.finished_at = time.perf_counter()
+        return state
+
+    return await asyncio.gather(*(one(i, q) for i, q in enumerate(queries)))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=20)
+    parser.add_argument("--pool", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.1)
+    args = parser.parse_args()
+
+    queries = [f"Task {i}: add 50 and 75" for i in range(args.tasks)]
+    make = make_llm(args.llm_latency)
+
+    print(f"=== Fresh server per task (concurrency {args.pool}) ===")
+    start = time.perf_counter()
+    states = await fresh_per_task(queries, make, args.pool)
+    fresh_elapsed = time.perf_counter() - start
+    report(states, fresh_elapsed)
+
+    print(f"\n=== Warm session pool (size {args.pool}) ===")
+    async with SessionPool(lambda: stdio_session(SERVER_PARAMS), size=args.pool) as pool:
+        start = time.perf_counter()
+        states = await run_tasks(pool, queries, make)
+        pooled_elapsed = time.perf_counter() - start
+        report(states, pooled_elapsed, pool.startup_time)
+
+    print(f"\nSpeedup: {fresh_elapsed / pooled_elapsed:.1f}x "
+          f"({fresh_elapsed / (pooled_elapsed + pool.startup_time):.1f}x including pool start-up)")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["serve"]:
+        serve()
+    else:
+        asyncio.run(main())
@@ -0,0 +1,91 @@
+"""
+Start-up cost of the drawing server: import time and time to a ready session.
+
+Import time comes from `python -X importtime`; time to ready is spawn +
+`initialize()` + `list_tools()` over stdio. Use `--record` to append each
+run to a JSONL history and see the change against the previous run:
+
+    python bench_startup.py --runs 5 --record startup_history.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from mcp import StdioServerParameters
+
+from runner import stdio_session
+
+SERVER = "drawing_mcp_server.py"
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile(module, env):
+    """(total seconds, [(cumulative seconds, name)] for the module's direct imports)"""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         capture_output=True, text=True, env=env, check=True).stderr
+    total, children = 0.0, {}
+    for match in LINE.finditer(out):
+        cumulative, indent, name = int(match[2]) / 1e6, len(match[3]), match[4]
+        if name == module:
+            total = cumulative
+        elif indent <= 3:
+            # Top-level import of the module (indent 1) or its first level of imports
+            top = name.split(".")[0]
+            children[top] = max(children.get(top, 0.0), cumulative)
+    return total, sorted(((t, n) for n, t in children.items()), reverse=True)
+
+
+async def time_to_ready(env, runs):
+    params = StdioServerParameters(command=sys.executable, args=[SERVER], env=env)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        async with stdio_session(params) as session:
+            await session.list_tools()
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--gui", action="store_true", help="measure with pyautogui enabled")
+    parser.add_argument("--record", help="append results to this JSONL file")
+    args = parser.parse_args()
+
+    env = dict(os.environ, DRAWING_HEADLESS="0" if args.gui else "1")
+    imports = [import_profile(SERVER[:-3], env)[0] for _ in range(args.runs)]
+    total, children = import_profile(SERVER[:-3], env)
+    ready = asyncio.run(time_to_ready(env, args.runs))
+
+    print(f"\nImport of {SERVER[:-3]}: median {sorted(imports)[len(imports) // 2] * 1000:.0f} ms")
+    print("Heaviest imports:")
+    for seconds, name in children[:8]:
+        print(f"  {name:<24}{seconds * 1000:>8.0f} ms")
+    ready_median = sorted(ready)[len(ready) // 2]
+    print(f"\nSpawn to ready session: median {ready_median * 1000:.0f} ms, "
+          f"min {min(ready) * 1000:.0f} ms over {len(ready)} runs")
+
+    if args.record:
+        entry = {"time": time.time(), "gui": args.gui,
+                 "import_ms": round(sorted(imports)[len(imports) // 2] * 1000),
+                 "ready_ms": round(ready_median * 1000)}
+        previous = None
+        if os.path.exists(args.record):
+            with open(args.record) as f:
+                history = [json.loads(line) for line in f if line.strip()]
+            previous = next((h for h in reversed(history) if h["gui"] == args.gui), None)
+        with open(args.record, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        if previous:
+            print(f"vs previous: import {entry['import_ms'] - previous['import_ms']:+d} ms, "
+                  f"ready {entry['ready_ms'] - previous['ready_ms']:+d} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Time to first byte and end-to-end latency with streamed tool progress.
+
+A fake slow tool works in steps. With progress enabled the client hears
+about the first step long before the result; the agent also overlaps
+building its next LLM request with the tool's run time. Runs over an
+in-memory MCP session with a scripted LLM, so no API key is needed:
+
+    python bench_streaming.py --steps 10 --step-delay 0.1 --prepare-cost 0.3
+"""
+import argparse
+import asyncio
+import time
+
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from agent import run_agent
+from llm import LLMTurn, ScriptedLLM, ToolCall
+
+
+def make_server():
+    mcp = FastMCP("bench-streaming")
+
+    @mcp.tool()
+    async def slow_render(steps: int, step_delay: float, ctx: Context) -> str:
+        """Pretend to render in steps, reporting each one"""
+        for step in range(1, steps + 1):
+            await asyncio.sleep(step_delay)
+            await ctx.report_progress(step, steps, f"tile {step} ready")
+        return f"rendered {steps} tiles"
+
+    return mcp
+
+
+async def time_call(session, args, stream):
+    """(time to first byte, total) for one call, with or without progress"""
+    start = time.perf_counter()
+    first = None
+
+    async def on_progress(progress, total, message):
+        nonlocal first
+        first = first or time.perf_counter() - start
+
+    await session.call_tool("slow_render", args, progress_callback=on_progress if stream else None)
+    total = time.perf_counter() - start
+    return first or total, total
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--step-delay", type=float, default=0.1)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--prepare-cost", type=float, default=0.3,
+                        help="simulated client-side request building per LLM call")
+    args = parser.parse_args()
+    tool_args = {"steps": args.steps, "step_delay": args.step_delay}
+    server = make_server()
+
+    async with create_connected_server_and_client_session(server._mcp_server) as session:
+        tools = (await session.list_tools()).tools
+        print(f"\n{'single tool call':<24}{'TTFB ms':>10}{'total ms':>10}")
+        for name, stream in (("result only", False), ("streamed progress", True)):
+            first, total = await time_call(session, tool_args, stream)
+            print(f"{name:<24}{first * 1000:>10.0f}{total * 1000:>10.0f}")
+
+        rows = []
+        for name, ahead in (("sequential", False), ("prepare during tools", True)):
+            script = [LLMTurn(tool_calls=[ToolCall("slow_render", tool_args)]) for _ in range(3)]
+            llm = ScriptedLLM(script, latency=args.llm_latency, prepare_cost=args.prepare_cost)
+            result = await run_agent(session, llm, "Render three times", tools,
+                                     max_iterations=len(script) + 1, prepare_ahead=ahead)
+            first = result.progress[0].elapsed if result.progress else result.elapsed
+            rows.append((name, len(result.progress), first, result.elapsed))
+
+    print(f"\n{'agent, 3 slow calls':<24}{'events':>8}{'first event s':>15}{'end-to-end s':>14}")
+    for name, events, first, elapsed in rows:
+        print(f"{name:<24}{events:>8}{first:>15.2f}{elapsed:>14.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""
+Thumbnail latency and peak memory on large synthetic images.
+
+Each mode runs in a fresh process so its peak RSS is measured on its own:
+
+    python bench_thumbnails.py --images 12 --width 6000 --height 4000
+"""
+import argparse
+import os
+import resource
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image as PILImage
+
+import thumbnails
+
+
+def make_images(directory, count, width, height):
+    rng = np.random.default_rng(0)
+    # Smooth gradients plus noise: compresses like a photo, not like flat colour
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)], -1)
+    paths = []
+    for i in range(count):
+        noise = rng.integers(0, 32, size=base.shape, dtype=np.uint8)
+        image = PILImage.fromarray((base + noise).astype(np.uint8))
+        ext = "jpg" if i % 2 == 0 else "png"
+        path = os.path.join(directory, f"image_{i}.{ext}")
+        image.save(path, quality=90) if ext == "jpg" else image.save(path, compress_level=1)
+        paths.append(path)
+    return paths
+
+
+def naive(path):
+    """The old tool: full decode, then raw pixels"""
+    img = PILImage.open(path)
+    img.thumbnail((100, 100))
+    return img.tobytes()
+
+
+def run_mode(mode, paths, cache_dir):
+    start = time.perf_counter()
+    if mode == "naive":
+        for path in paths:
+            naive(path)
+    elif mode in ("draft, cold cache", "warm cache"):
+        for path in paths:
+            thumbnails.thumbnail(path, cache_dir=cache_dir)
+    elif mode == "batch, process pool":
+        with ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1)) as pool:
+            results = thumbnails.thumbnail_batch(paths, cache_dir=cache_dir, pool=pool)
+        assert all(error is None for _, _, error in results)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    return elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", type=int, default=12)
+    parser.add_argument("--width", type=int, default=6000)
+    parser.add_argument("--height", type=int, default=4000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="thumb_bench_")
+    try:
+        print(f"Generating {args.images} images of {args.width}x{args.height}...")
+        paths = make_images(workdir, args.images, args.width, args.height)
+        cache_dir = os.path.join(workdir, "cache")
+        batch_cache = os.path.join(workdir, "batch_cache")
+
+        print(f"\n{'mode':<22}{'total s':>9}{'ms/image':>10}{'peak MB':>9}")
+        for mode, cache in (("naive", None), ("draft, cold cache", cache_dir),
+                            ("warm cache", cache_dir), ("batch, process pool", batch_cache)):
+            with ProcessPoolExecutor(max_workers=1) as fresh:
+                elapsed, peak = fresh.submit(run_mode, mode, paths, cache).result()
+            print(f"{mode:<22}{elapsed:>9.2f}{elapsed * 1000 / len(paths):>10.1f}{peak:>9.0f}")
+        print(f"\n(batch peak is the parent process; each worker decodes one image at a time; "
+              f"{os.cpu_count()} CPUs)")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
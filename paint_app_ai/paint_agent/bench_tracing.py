@@ -0,0 +1,72 @@
+"""
+Cost of tracing: time per span, and its share of a real tool call.
+
+Times empty spans with summaries only and with the JSONL exporter, then runs
+the drawing server's tools through the agent's call path over an in-memory
+MCP session, where each call opens three spans (tool.coerce, mcp.call_tool
+and tool.execute), and prints the per-tool percentiles that produces:
+
+    python bench_tracing.py --spans 100000 --calls 500
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from agent import call_tool
+from drawing_mcp_server import mcp
+from llm import ToolCall
+from tool_registry import discover_tools
+from tracing import JsonlExporter, Tracer, tracer
+
+CALLS = [ToolCall("add", {"a": 2, "b": 3}),
+         ToolCall("strings_to_chars_to_int", {"string": "tracing"}),
+         ToolCall("vector_reduce", {"op": "norm", "values": [3.0, 4.0]})]
+
+
+def span_cost(t, count):
+    """Nanoseconds per empty span"""
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        with t.span("bench", tool="x"):
+            pass
+    t.flush()
+    return (time.perf_counter_ns() - start) / count
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--spans", type=int, default=100_000)
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "spans.jsonl")
+    costs = {"summary only": span_cost(Tracer(), args.spans),
+             "jsonl export": span_cost(Tracer(JsonlExporter(path)), args.spans)}
+    print(f"Empty span, {args.spans} iterations:")
+    for label, ns in costs.items():
+        print(f"  {label:<14} {ns / 1000:6.2f} us/span")
+
+    # The server's per-request INFO log would dominate the round trip
+    logging.getLogger("mcp").setLevel(logging.WARNING)
+    async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+        registry = await discover_tools(session)
+        for call in CALLS:  # warm up
+            await call_tool(session, call, registry)
+        start = time.perf_counter()
+        for i in range(args.calls):
+            await call_tool(session, CALLS[i % len(CALLS)], registry)
+        per_call = (time.perf_counter() - start) / args.calls * 1e6
+
+    worst = 3 * costs["jsonl export"] / 1000
+    print(f"\nTool call round trip: {per_call:.1f} us; 3 spans cost {worst:.1f} us "
+          f"({worst / per_call:.1%}) with JSONL export\n")
+    tracer.print_summary()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""
+Session setup time and calls per second: cold stdio vs warm streamable HTTP.
+
+stdio pays interpreter start-up and imports for every session. Over HTTP the
+server is started once and sessions only pay `initialize()`. By default this
+spawns a small built-in server (`python bench_transport.py serve ...`); pass
+`--server drawing_mcp_server.py` to measure the real drawing server:
+
+    python bench_transport.py --sessions 5 --calls 200
+"""
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+from mcp.server.fastmcp import FastMCP
+
+from runner import connect
+
+
+def serve(transport, port):
+    mcp = FastMCP("bench-transport-server", log_level="WARNING", port=port)
+
+    @mcp.tool()
+    def add(a: int, b: int) -> int:
+        """Add two numbers"""
+        return a + b
+
+    mcp.run(transport=transport)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_http_server(script, port):
+    args = ([script, "--transport", "streamable-http", "--port", str(port)] if script
+            else [__file__, "serve", "streamable-http", str(port)])
+    process = subprocess.Popen([sys.executable, *args], stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/mcp", timeout=0.5)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("HTTP server did not start")
+
+
+async def measure(factory, sessions, calls, concurrency):
+    """(mean session setup s, calls/s on one session)"""
+    setups = []
+    for _ in range(sessions):
+        start = time.perf_counter()
+        async with factory() as session:
+            await session.list_tools()
+            setups.append(time.perf_counter() - start)
+    # Teardown is left out of the setup figure; reuse one session for calls
+    async with factory() as session:
+        limit = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with limit:
+                await session.call_tool("add", {"a": i, "b": i})
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(calls)))
+        rate = calls / (time.perf_counter() - start)
+    return sum(setups) / len(setups), rate
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--server", help="server script with --transport/--port flags")
+    args = parser.parse_args()
+
+    stdio_target = args.server or __file__
+    if args.server:
+        stdio = connect("stdio", stdio_target)
+    else:
+        from mcp import StdioServerParameters
+        from runner import stdio_session
+        params = StdioServerParameters(command=sys.executable, args=[__file__, "serve", "stdio", "0"])
+        stdio = lambda: stdio_session(params)
+
+    port = free_port()
+    server_start = time.perf_counter()
+    process = start_http_server(args.server, port)
+    server_start = time.perf_counter() - server_start
+    try:
+        http = connect("streamable-http", f"http://127.0.0.1:{port}/mcp")
+        rows = [("stdio, cold", *await measure(stdio, args.sessions, args.calls, args.concurrency)),
+                ("streamable HTTP, warm", *await measure(http, args.sessions, args.calls,
+                                                         args.concurrency))]
+    finally:
+        process.terminate()
+        process.wait()
+
+    print(f"\nHTTP server start-up (paid once): {server_start:.2f}s\n")
+    print(f"{'transport':<24}{'setup ms':>10}{'calls/s':>10}")
+    for name, setup, rate in rows:
+        print(f"{name:<24}{setup * 1000:>10.0f}{rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["serve"]:
+        serve(sys.argv[2], int(sys.argv[3]))
+    else:
+        asyncio.run(main())
@@ -0,0 +1,128 @@
+"""
+Per-client canvases for the drawing MCP server.
+
+Every `open_drawing_app` call creates a canvas with its own id, image, draw
+handle, display list and lock, so concurrent agents never draw on each
+other's picture. The store keeps at most `max_canvases` canvases and
+`max_bytes` of pixels, evicting the least recently used first, and drops
+canvases idle for longer than `idle_seconds`.
+
+Canvases belong to the MCP session that created them and are numbered per
+session (canvas-1, canvas-2, ...). A run therefore sees the same ids every
+time, which LLM record/replay depends on: the ids end up in the prompt.
+Anything that must be unique across sessions, such as export file names,
+adds `Canvas.scope`.
+"""
+import asyncio
+import itertools
+import time
+import weakref
+from collections import OrderedDict
+
+from PIL import Image as PILImage, ImageDraw
+
+from display_list import DisplayList
+
+MAX_SIDE = 4096
+
+
+class CanvasNotFound(KeyError):
+    """Unknown or evicted canvas id"""
+
+
+class Canvas:
+    def __init__(self, canvas_id, width, height, color="white", scope=0):
+        self.id = canvas_id
+        self.scope = scope  # the owning session's number; ids repeat across sessions
+        self.image = PILImage.new("RGB", (width, height), color=color)
+        self.draw = ImageDraw.Draw(self.image)
+        self.display_list = DisplayList((width, height), color)
+        self.last_rectangle = None
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+    def apply(self, ops):
+        """Draw validated DrawOps and record them in the display list"""
+        self.display_list.apply(self.image, self.draw, ops)
+        for op in ops:
+            if op.op == "rectangle":
+                self.last_rectangle = (op.x1, op.y1, op.x2, op.y2)
+
+    @property
+    def nbytes(self):
+        width, height = self.image.size
+        return width * height * len(self.image.getbands())
+
+
+class CanvasStore:
+    """LRU of canvases bounded by count, total pixel memory and idle time"""
+
+    def __init__(self, max_canvases=32, max_bytes=256 * 1024 * 1024, idle_seconds=1800):
+        self.max_canvases = max_canvases
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self._canvases = OrderedDict()  # (scope, canvas id) -> Canvas
+        self._owners = weakref.WeakKeyDictionary()  # session -> [scope, canvases created]
+        self._default = [0, 0]  # for callers without a session
+        self._scopes = itertools.count(1)
+        self.evicted = 0
+
+    @property
+    def total_bytes(self):
+        return sum(c.nbytes for c in self._canvases.values())
+
+    def __len__(self):
+        return len(self._canvases)
+
+    def _owner(self, owner):
+        if owner is None:
+            return self._default
+        entry = self._owners.get(owner)
+        if entry is None:
+            entry = self._owners[owner] = [next(self._scopes), 0]
+        return entry
+
+    def create(self, width=800, height=600, color="white", owner=None):
+        """New canvas, numbered within `owner` (normally the MCP session)"""
+        if not (0 < width <= MAX_SIDE and 0 < height <= MAX_SIDE):
+            raise ValueError(f"Canvas size must be between 1 and {MAX_SIDE} pixels per side")
+        entry = self._owner(owner)
+        entry[1] += 1
+        canvas = Canvas(f"canvas-{entry[1]}", width, height, color, scope=entry[0])
+        key = (entry[0], canvas.id)
+        self._canvases[key] = canvas
+        self._evict(keep=key)
+        return canvas
+
+    def get(self, canvas_id, owner=None):
+        key = (self._owner(owner)[0], canvas_id)
+        canvas = self._canvases.get(key)
+        if canvas is None:
+            raise CanvasNotFound(f"Canvas {canvas_id!r} not found. Call open_drawing_app first.")
+        canvas.last_used = time.monotonic()
+        self._canvases.move_to_end(key)
+        self._evict(keep=key)
+        return canvas
+
+    def close(self, canvas_id, owner=None):
+        self._canvases.pop((self._owner(owner)[0], canvas_id), None)
+
+    def _evict(self, keep):
+        """Drop idle canvases, then the least recently used until within limits"""
+        now = time.monotonic()
+        for key, canvas in list(self._canvases.items()):
+            if key != keep and now - canvas.last_used > self.idle_seconds \
+                    and not canvas.lock.locked():
+                del self._canvases[key]
+                self.evicted += 1
+
+        total = self.total_bytes
+        for key, canvas in list(self._canvases.items()):
+            if len(self._canvases) <= self.max_canvases and total <= self.max_bytes:
+                break
+            # Never evict the canvas being used or one a tool is drawing on
+            if key == keep or canvas.lock.locked():
+                continue
+            del self._canvases[key]
+            total -= canvas.nbytes
+            self.evicted += 1
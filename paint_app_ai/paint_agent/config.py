@@ -0,0 +1,49 @@
+"""
+Settings shared by the drawing server and the agent, read from the environment.
+
+    DRAWING_CANVAS_WIDTH / DRAWING_CANVAS_HEIGHT   default canvas size (800x600)
+    DRAWING_HEADLESS     1 = never touch the GUI, 0 = allow pyautogui; unset
+                         means headless on Linux without $DISPLAY. Without
+                         pyautogui installed the GUI is treated as absent.
+    DRAWING_GUI_PAUSE    pyautogui pause after each action, seconds (0.05)
+"""
+import os
+import sys
+
+CANVAS_WIDTH = int(os.getenv("DRAWING_CANVAS_WIDTH", 800))
+CANVAS_HEIGHT = int(os.getenv("DRAWING_CANVAS_HEIGHT", 600))
+
+_headless = os.getenv("DRAWING_HEADLESS")
+if _headless is None:
+    HEADLESS = sys.platform.startswith("linux") and not os.getenv("DISPLAY")
+else:
+    HEADLESS = _headless == "1"
+
+GUI_PAUSE = float(os.getenv("DRAWING_GUI_PAUSE", 0.05))
+
+_pyautogui = None
+
+
+def gui():
+    """pyautogui, imported and configured on first use; None in headless mode
+    or when pyautogui is not installed"""
+    global HEADLESS, _pyautogui
+    if HEADLESS:
+        return None
+    if _pyautogui is None:
+        try:
+            import pyautogui
+        except ImportError:
+            print("pyautogui is not installed; running headless", file=sys.stderr)
+            HEADLESS = True
+            return None
+        pyautogui.FAILSAFE = True
+        pyautogui.PAUSE = GUI_PAUSE
+        _pyautogui = pyautogui
+    return _pyautogui
+
+
+def screen_size():
+    """Screen size when a GUI is available, else the configured canvas size"""
+    pyautogui = gui()
+    return tuple(pyautogui.size()) if pyautogui else (CANVAS_WIDTH, CANVAS_HEIGHT)
@@ -0,0 +1,109 @@
+"""
+Bounded, incremental prompt construction for the agent loop.
+
+The prompt is laid out so the front of it never changes between turns:
+
+    prefix  system prompt + tool declarations + task   (built once, stable)
+    middle  summary of older steps + last `window` steps in full
+    suffix  fixed "continue" instruction                (stable)
+
+A stable prefix lets provider-side prompt caching hit on every turn. Steps
+that fall out of the window are summarised once, as one line each, and the
+window shrinks further if the prompt would exceed `token_budget`, so the
+prompt stays roughly constant in size however many iterations run.
+"""
+import json
+
+CONTINUE_PROMPT = ("Continue the task using the results above. "
+                   "Reply without function calls once every step is done.")
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), good enough for budgeting"""
+    return len(text) // 4 + 1
+
+
+def _turn_text(turn):
+    calls = "; ".join(f"{c.name}({json.dumps(c.args)})" for c in turn.tool_calls)
+    return f"{turn.text} {calls}".strip()
+
+
+class AgentContext:
+    """Builds the message list for each turn under a token budget"""
+
+    def __init__(self, system_prompt, tools, task, window=4, token_budget=4000,
+                 max_summary_lines=20, result_chars=120):
+        self.system_prompt = system_prompt
+        self.tools = tools
+        self.task = task
+        self.window = window
+        self.token_budget = token_budget
+        self.max_summary_lines = max_summary_lines
+        self.result_chars = result_chars
+
+        self._prefix_tokens = (estimate_tokens(system_prompt)
+                               + estimate_tokens(json.dumps(tools))
+                               + estimate_tokens(task))
+        self._steps = []       # [(model message, tool message or None, tokens)]
+        self._summary = []     # one line per step that left the window
+        self._summarised = 0   # how many of self._steps are in the summary
+        self.sizes = []        # (messages, approx tokens) per built prompt
+
+    def add_step(self, model_message, tool_message=None):
+        tokens = estimate_tokens(_turn_text(model_message["turn"]))
+        if tool_message:
+            tokens += sum(estimate_tokens(result) for _, result in tool_message["results"])
+        self._steps.append((model_message, tool_message, tokens))
+
+    def _summarise(self, step_number, model_message, tool_message):
+        turn = model_message["turn"]
+        if not tool_message:
+            return f"Step {step_number}: {turn.text[:self.result_chars]}"
+        results = ", ".join(
+            f"{call.name}({json.dumps(call.args)}) -> {result[:self.result_chars]}"
+            for call, result in tool_message["results"]
+        )
+        return f"Step {step_number}: {results}"
+
+    def _fold(self, keep):
+        """Move every step before the last `keep` into the summary"""
+        while len(self._steps) - self._summarised > keep:
+            model_message, tool_message, _ = self._steps[self._summarised]
+            self._summarised += 1
+            self._summary.append(self._summarise(self._summarised, model_message, tool_message))
+        if len(self._summary) > self.max_summary_lines:
+            del self._summary[:len(self._summary) - self.max_summary_lines]
+
+    def messages(self):
+        """Messages for the next LLM call, with the size recorded in `sizes`"""
+        self._fold(self.window)
+        # Shrink the window until the prompt fits the budget (keep at least one step)
+        while True:
+            recent = self._steps[self._summarised:]
+            summary_text = self._summary_text()
+            tokens = (self._prefix_tokens + estimate_tokens(summary_text)
+                      + sum(t for _, _, t in recent) + estimate_tokens(CONTINUE_PROMPT))
+            if tokens <= self.token_budget or len(recent) <= 1:
+                break
+            self._fold(len(recent) - 1)
+
+        messages = [{"role": "user", "text": self.task}]
+        if summary_text:
+            messages.append({"role": "user", "text": summary_text})
+        for model_message, tool_message, _ in recent:
+            messages.append(model_message)
+            if tool_message:
+                messages.append(tool_message)
+        if recent:
+            messages.append({"role": "user", "text": CONTINUE_PROMPT})
+        self.sizes.append((len(messages), tokens))
+        return messages
+
+    def _summary_text(self):
+        if not self._summary:
+            return ""
+        omitted = self._summarised - len(self._summary)
+        lines = ["Earlier steps (summarised):"]
+        if omitted:
+            lines.append(f"({omitted} older steps omitted)")
+        return "\n".join(lines + self._summary)
@@ -0,0 +1,158 @@
+"""
+Display list of drawing operations.
+
+Every primitive drawn on a canvas is validated into a `DrawOp` and recorded,
+so a canvas can be replayed onto a fresh image, compared with another one,
+or rendered again at a different scale without re-running the agent.
+
+Supported ops (coordinates in canvas pixels):
+    rectangle  x1 y1 x2 y2 [outline fill width]
+    ellipse    x1 y1 x2 y2 [outline fill width]
+    line       points=[[x, y], ...] [color width]
+    text       x y text [color size anchor]      anchor "mm" centres on (x, y)
+    fill       color [x y]                        flood fill from (x, y), else whole canvas
+"""
+from functools import lru_cache
+from typing import Literal
+
+from PIL import Image as PILImage, ImageChops, ImageColor, ImageDraw, ImageFont
+from pydantic import BaseModel, ConfigDict, TypeAdapter, model_validator
+
+FONT_PATH = "/System/Library/Fonts/Helvetica.ttc"
+
+
+@lru_cache(maxsize=64)
+def load_font(size, path=FONT_PATH):
+    """Font for (size, path), parsed from disk only the first time"""
+    try:
+        return ImageFont.truetype(path, size)
+    except OSError:
+        return ImageFont.load_default(size)
+
+
+class DrawOp(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    op: Literal["rectangle", "ellipse", "line", "text", "fill"]
+    x1: float | None = None
+    y1: float | None = None
+    x2: float | None = None
+    y2: float | None = None
+    x: float | None = None
+    y: float | None = None
+    points: list[tuple[float, float]] | None = None
+    text: str | None = None
+    outline: str | None = "black"
+    fill: str | None = None
+    color: str = "black"
+    width: int = 3
+    size: int = 40
+    anchor: str = "la"
+
+    @model_validator(mode="after")
+    def _check_fields(self):
+        needed = {
+            "rectangle": ("x1", "y1", "x2", "y2"),
+            "ellipse": ("x1", "y1", "x2", "y2"),
+            "line": ("points",),
+            "text": ("x", "y", "text"),
+            "fill": (),
+        }[self.op]
+        missing = [name for name in needed if getattr(self, name) is None]
+        if missing:
+            raise ValueError(f"{self.op} needs {', '.join(missing)}")
+        if self.op == "line" and len(self.points) < 2:
+            raise ValueError("line needs at least two points")
+        return self
+
+
+def draw_op(image, draw, op, scale=1.0):
+    """Render one op onto `image` (through `draw`), coordinates multiplied by `scale`"""
+    s = lambda v: v * scale
+    width = max(1, round(op.width * scale))
+    if op.op in ("rectangle", "ellipse"):
+        box = [s(op.x1), s(op.y1), s(op.x2), s(op.y2)]
+        shape = draw.rectangle if op.op == "rectangle" else draw.ellipse
+        shape(box, outline=op.outline, fill=op.fill, width=width)
+    elif op.op == "line":
+        draw.line([(s(x), s(y)) for x, y in op.points], fill=op.color, width=width)
+    elif op.op == "text":
+        draw.text((s(op.x), s(op.y)), op.text, fill=op.color,
+                  font=load_font(max(1, round(op.size * scale))), anchor=op.anchor)
+    elif op.op == "fill":
+        if op.x is None or op.y is None:
+            draw.rectangle([(0, 0), image.size], fill=op.color)
+        else:
+            ImageDraw.floodfill(image, (s(op.x), s(op.y)), ImageColor.getrgb(op.color))
+
+
+_OPS = TypeAdapter(list[DrawOp])
+
+
+def _op_json(op):
+    return {"op": op.op} | op.model_dump(exclude_defaults=True, exclude={"op"})
+
+
+class DisplayList:
+    """Append-only record of the ops drawn on one canvas"""
+
+    def __init__(self, size, background="white"):
+        self.size = size
+        self.background = background
+        self.ops = []
+
+    def __len__(self):
+        return len(self.ops)
+
+    def parse(self, ops):
+        """Validate raw dicts into DrawOps (all or nothing)"""
+        return _OPS.validate_python(ops)
+
+    def apply(self, image, draw, ops):
+        """Draw already-validated ops and record them"""
+        for op in ops:
+            draw_op(image, draw, op)
+        self.ops.extend(ops)
+
+    def copy(self):
+        snapshot = DisplayList(self.size, self.background)
+        snapshot.ops = list(self.ops)
+        return snapshot
+
+    def render(self, scale=1.0):
+        """Replay every op onto a new image, `scale` times the canvas size"""
+        width, height = self.size
+        image = PILImage.new("RGB", (max(1, round(width * scale)), max(1, round(height * scale))),
+                             self.background)
+        draw = ImageDraw.Draw(image)
+        for op in self.ops:
+            draw_op(image, draw, op, scale)
+        return image
+
+    def to_json(self):
+        return {"size": list(self.size), "background": self.background,
+                "ops": [_op_json(op) for op in self.ops]}
+
+    @classmethod
+    def from_json(cls, data):
+        display_list = cls(tuple(data["size"]), data.get("background", "white"))
+        display_list.ops = display_list.parse(data["ops"])
+        return display_list
+
+
+def diff(old, new):
+    """Ops only in `old` / only in `new` after their common prefix, plus the changed pixel box"""
+    common = 0
+    for a, b in zip(old.ops, new.ops):
+        if a != b:
+            break
+        common += 1
+    bbox = None
+    if old.size == new.size:
+        bbox = ImageChops.difference(old.render(), new.render()).getbbox()
+    return {
+        "common": common,
+        "removed": [_op_json(op) for op in old.ops[common:]],
+        "added": [_op_json(op) for op in new.ops[common:]],
+        "changed_bbox": bbox,
+    }
@@ -1,36 +1,52 @@
 # basic import 
-from mcp.server.fastmcp import FastMCP, Image
+from mcp.server.fastmcp import Context, FastMCP, Image
 from mcp.server.fastmcp.prompts import base
 from mcp.types import TextContent
 from mcp import types
-from PIL import Image as PILImage
+import argparse
 import math
+import os
 import sys
-import pyautogui
 from mcp.server import Server
-import subprocess
-import time
 from mcp.server.stdio import stdio_server
 import asyncio 
-from PIL import Image as PILImage, ImageDraw, ImageFont
+
+import config
+from canvas_store import MAX_SIDE, CanvasStore
+from display_list import DrawOp
+from exporter import Exporter
+import thumbnails
+import math_tools
+from pydantic import ValidationError
+from tracing import traced_tool, tracer
 # instantiate an MCP server client
 mcp = FastMCP("mac-drawing-server")
+# Use @tool() instead of @mcp.tool(): same registration, plus a tool.execute span.
+# Tool calls are traced rather than printed; stdout carries the stdio transport
+tool = traced_tool(mcp)
 
-drawing_app = None
- 
-app_process = None
-
+# One canvas per open_drawing_app call, so concurrent agents stay separate
+canvases = CanvasStore()
+# PNG/WebP encoding, file output and the optional viewer, all off the event loop
+exporter = Exporter.from_env()
+# Worker processes for expensive math, with a per-call timeout
+heavy = math_tools.HeavyPool(timeout=float(os.getenv("MATH_TIMEOUT", math_tools.DEFAULT_TIMEOUT)))
 
-# Global to store the canvas
+# draw_batch applies this many ops between progress reports
+BATCH_CHUNK = 100
+# render_canvas output limit: the pixels of the largest canvas (48 MB as RGB)
+MAX_RENDER_PIXELS = MAX_SIDE * MAX_SIDE
 
 
-canvas_image = None
-canvas_draw = None
-last_rectangle = None  # Add this
+async def run_heavy(ctx, fn, *args):
+    """Run `fn` in the math pool, telling the client when it starts and ends"""
+    await ctx.report_progress(0, 1, f"{fn.__name__} running in a worker process")
+    result = await heavy.run(fn, *args)
+    await ctx.report_progress(1, 1, f"{fn.__name__} done, {len(result)} digits")
+    return result
 
-# Safety settings
-pyautogui.FAILSAFE = True
-pyautogui.PAUSE = 0.3
+# GUI automation (pyautogui) is optional: config.gui() imports it on first
+# use and returns None in headless mode
 
 PRIMARY_MONITOR_WIDTH = 1512
 USE_SECONDARY_MONITOR = False
@@ -38,145 +54,168 @@ SECONDARY_MONITOR_OFFSET_X = 0
 
 # DEFINE TOOLS
 
-@mcp.tool()
+@tool()
 def add(a: int, b: int) -> int:
     """Add two numbers"""
-    print("CALLED: add(a: int, b: int) -> int:")
     return int(a + b)
 
-@mcp.tool()
+@tool()
 def add_list(l: list) -> int:
     """Add all numbers in a list"""
-    print("CALLED: add(l: list) -> int:")
+    if len(l) > math_tools.MAX_VECTOR_LEN:
+        raise ValueError(f"List has {len(l)} elements, limit is {math_tools.MAX_VECTOR_LEN}")
     return sum(l)
 
-@mcp.tool()
+@tool()
 def subtract(a: int, b: int) -> int:
     """Subtract two numbers"""
-    print("CALLED: subtract(a: int, b: int) -> int:")
     return int(a - b)
 
-@mcp.tool()
+@tool()
 def multiply(a: int, b: int) -> int:
     """Multiply two numbers"""
-    print("CALLED: multiply(a: int, b: int) -> int:")
     return int(a * b)
 
-@mcp.tool() 
+@tool() 
 def divide(a: int, b: int) -> float:
     """Divide two numbers"""
-    print("CALLED: divide(a: int, b: int) -> float:")
     return float(a / b)
 
-@mcp.tool()
-def power(a: int, b: int) -> int:
-    """Power of two numbers"""
-    print("CALLED: power(a: int, b: int) -> int:")
-    return int(a ** b)
+@tool()
+async def power(a: int, b: int, ctx: Context) -> int | str:
+    """Power of two numbers (huge results come back as a decimal string)"""
+    if math_tools.check_power(a, b) <= math_tools.INLINE_DIGITS:
+        return math_tools.int_result(a ** b)
+    return await run_heavy(ctx, math_tools.power_str, a, b)
 
-@mcp.tool()
+@tool()
 def sqrt(a: int) -> float:
     """Square root of a number"""
-    print("CALLED: sqrt(a: int) -> float:")
     return float(a ** 0.5)
 
-@mcp.tool()
+@tool()
 def cbrt(a: int) -> float:
     """Cube root of a number"""
-    print("CALLED: cbrt(a: int) -> float:")
     return float(a ** (1/3))
 
-@mcp.tool()
-def factorial(a: int) -> int:
-    """factorial of a number"""
-    print("CALLED: factorial(a: int) -> int:")
-    return int(math.factorial(a))
+@tool()
+async def factorial(a: int, ctx: Context) -> int | str:
+    """factorial of a number (huge results come back as a decimal string)"""
+    math_tools.check_factorial(a)
+    if a <= math_tools.INLINE_FACTORIAL_N:
+        return math_tools.int_result(math.factorial(a))
+    return await run_heavy(ctx, math_tools.factorial_str, a)
 
-@mcp.tool()
+@tool()
 def remainder(a: int, b: int) -> int:
     """remainder of two numbers divison"""
-    print("CALLED: remainder(a: int, b: int) -> int:")
     return int(a % b)
 
-@mcp.tool()
+@tool()
 def sin(a: int) -> float:
     """sin of a number"""
-    print("CALLED: sin(a: int) -> float:")
     return float(math.sin(a))
 
-@mcp.tool()
+@tool()
 def cos(a: int) -> float:
     """cos of a number"""
-    print("CALLED: cos(a: int) -> float:")
     return float(math.cos(a))
 
-@mcp.tool()
+@tool()
 def tan(a: int) -> float:
     """tan of a number"""
-    print("CALLED: tan(a: int) -> float:")
     return float(math.tan(a))
 
-@mcp.tool()
+@tool()
 def mine(a: int, b: int) -> int:
     """special mining tool"""
-    print("CALLED: mine(a: int, b: int) -> int:")
     return int(a - b - b)
 
-@mcp.tool()
-def create_thumbnail(image_path: str) -> Image:
-    """Create a thumbnail from an image"""
-    print("CALLED: create_thumbnail(image_path: str) -> Image:")
-    img = PILImage.open(image_path)
-    img.thumbnail((100, 100))
-    return Image(data=img.tobytes(), format="png")
+@tool()
+async def create_thumbnail(image_path: str, size: int = 100, format: str = "png") -> Image:
+    """Create a thumbnail (png or webp, at most size pixels per side) from an image"""
+    data = await asyncio.to_thread(thumbnails.thumbnail, image_path, size, format)
+    return Image(data=data, format=format)
+
+@tool(structured_output=False)
+async def create_thumbnails(image_paths: list[str], ctx: Context, size: int = 100,
+                            format: str = "png") -> list:
+    """Create thumbnails for many images at once, in parallel worker processes"""
+    loop = asyncio.get_running_loop()
+    pool = thumbnails.get_pool()
+    jobs = [loop.run_in_executor(pool, thumbnails.thumbnail_job,
+                                 (path, size, format, thumbnails.CACHE_DIR))
+            for path in image_paths]
+    results = {}
+    # Report each file as it finishes rather than after the slowest one
+    for done, job in enumerate(asyncio.as_completed(jobs), 1):
+        path, data, error = await job
+        results[path] = (data, error)
+        await ctx.report_progress(done, len(jobs), f"{path}: {error or 'done'}")
+    content = []
+    for path in image_paths:
+        data, error = results[path]
+        if error:
+            content.append(TextContent(type="text", text=f"{path}: Error: {error}"))
+        else:
+            content.append(Image(data=data, format=format))
+    return content
 
-@mcp.tool()
+@tool()
 def strings_to_chars_to_int(string: str) -> list[int]:
     """Return the ASCII values of the characters in a word"""
-    print("CALLED: strings_to_chars_to_int(string: str) -> list[int]:")
     return [int(ord(char)) for char in string]
 
-@mcp.tool()
-def int_list_to_exponential_sum(int_list: list) -> float:
-    """Return sum of exponentials of numbers in a list"""
-    print("CALLED: int_list_to_exponential_sum(int_list: list) -> float:")
-    return sum(math.exp(i) for i in int_list)
+@tool()
+def int_list_to_exponential_sum(int_list: list) -> float | str:
+    """Return sum of exponentials of numbers in a list ("inf" if it overflows)"""
+    return math_tools.reduce("exp_sum", int_list)
 
-@mcp.tool()
+@tool()
 def fibonacci_numbers(n: int) -> list:
     """Return the first n Fibonacci Numbers"""
-    print("CALLED: fibonacci_numbers(n: int) -> list:")
-    if n <= 0:
-        return []
-    fib_sequence = [0, 1]
-    for _ in range(2, n):
-        fib_sequence.append(fib_sequence[-1] + fib_sequence[-2])
-    return fib_sequence[:n]
+    return math_tools.fibonacci_list(n)
+
+@tool()
+async def fibonacci(n: int, ctx: Context) -> str:
+    """Return the n-th Fibonacci number (as a decimal string, it can be huge)"""
+    if n <= math_tools.INLINE_FIBONACCI_N:
+        return math_tools.decimal_str(math_tools.fibonacci(n))
+    return await run_heavy(ctx, math_tools.fibonacci_str, n)
+
+@tool()
+def vector_elementwise(op: str, a: list[float], b: list[float] | None = None) -> list:
+    """Elementwise op over whole lists at once: add, subtract, multiply, divide,
+    power (these take a and b; b may have one element), exp, log, sqrt, sin,
+    cos, tan, abs. Non-finite results come back as "inf", "-inf" or "nan"."""
+    return math_tools.elementwise(op, a, b)
+
+@tool()
+def vector_reduce(op: str, values: list[float]) -> float | str:
+    """Reduce a list to one number: sum, mean, min, max, prod, std, norm, exp_sum"""
+    return math_tools.reduce(op, values)
 
 def log(message: str):
     """Log to stderr"""
     print(f"[MAC-SERVER] {message}", file=sys.stderr, flush=True)
 
-@mcp.tool()
-async def open_drawing_app() -> dict:
-    """Create a blank canvas"""
-    global drawing_app, canvas_image, canvas_draw
-    
+@tool()
+async def open_drawing_app(ctx: Context, width: int = config.CANVAS_WIDTH,
+                           height: int = config.CANVAS_HEIGHT) -> dict:
+    """Create a blank canvas and return its canvas_id for the other drawing tools"""
     try:
         log("Creating blank canvas...")
         
-        # Create a white canvas
-        canvas_image = PILImage.new('RGB', (800, 600), color='white')
-        canvas_draw = ImageDraw.Draw(canvas_image)
+        # Each call gets its own white canvas, numbered within this session
+        canvas = canvases.create(width, height, owner=ctx.session)
         
-        drawing_app = True
-        log("Canvas created successfully")
+        log(f"Canvas {canvas.id} created successfully ({len(canvases)} open)")
         
         return {
             "content": [
                 TextContent(
                     type="text",
-                    text="Canvas created successfully"
+                    text=f"Canvas created successfully. canvas_id={canvas.id} size={width}x{height}"
                 )
             ]
         }
@@ -193,29 +232,18 @@ async def open_drawing_app() -> dict:
         }
 
 
-@mcp.tool()
-async def draw_rectangle(x1: int, y1: int, x2: int, y2: int) -> dict:
-    """Draw a rectangle on canvas"""
-    global drawing_app, canvas_draw, last_rectangle
-    
+@tool()
+async def draw_rectangle(canvas_id: str, x1: int, y1: int, x2: int, y2: int,
+                         ctx: Context) -> dict:
+    """Draw a rectangle on the canvas returned by open_drawing_app"""
     try:
-        if not drawing_app:
-            return {
-                "content": [
-                    TextContent(
-                        type="text",
-                        text="Canvas not ready. Call open_drawing_app first."
-                    )
-                ]
-            }
-        
-        log(f"Drawing rectangle: ({x1},{y1}) to ({x2},{y2})")
+        canvas = canvases.get(canvas_id, ctx.session)
         
-        # Draw rectangle on canvas
-        canvas_draw.rectangle([x1, y1, x2, y2], outline='black', width=3)
+        log(f"Drawing rectangle on {canvas_id}: ({x1},{y1}) to ({x2},{y2})")
         
-        # Store rectangle coordinates for text placement
-        last_rectangle = (x1, y1, x2, y2)
+        async with canvas.lock:
+            # Draw rectangle on canvas; its coordinates are kept for text placement
+            canvas.apply([DrawOp(op="rectangle", x1=x1, y1=y1, x2=x2, y2=y2)])
         
         log("Rectangle drawn successfully")
         
@@ -239,71 +267,89 @@ async def draw_rectangle(x1: int, y1: int, x2: int, y2: int) -> dict:
             ]
         }
 
-@mcp.tool()
-async def add_text_in_drawing_app(text: str) -> dict:
-    """Add text to canvas and display result"""
-    global drawing_app, canvas_image, canvas_draw, last_rectangle
-    
+@tool(structured_output=False)
+async def add_text_in_drawing_app(canvas_id: str, text: str, ctx: Context) -> list:
+    """Add text to the canvas returned by open_drawing_app and export the result"""
     try:
-        if not drawing_app:
-            return {
-                "content": [
-                    TextContent(
-                        type="text",
-                        text="Canvas not ready. Call open_drawing_app first."
-                    )
-                ]
-            }
+        canvas = canvases.get(canvas_id, ctx.session)
         
-        log(f"Adding text: '{text}'")
+        log(f"Adding text to {canvas_id}: '{text}'")
         
-        # Load font
-        try:
-            font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 40)
-        except:
-            font = ImageFont.load_default()
+        async with canvas.lock:
+            # Centre of the last rectangle, or of the canvas if there is none
+            if canvas.last_rectangle:
+                x1, y1, x2, y2 = canvas.last_rectangle
+            else:
+                x1, y1, (x2, y2) = 0, 0, canvas.image.size
+            canvas.apply([DrawOp(op="text", x=(x1 + x2) / 2, y=(y1 + y2) / 2, text=text,
+                                 anchor="mm")])
+            snapshot = canvas.image.copy()
         
-        # Calculate text position - center of last rectangle
-        if last_rectangle:
-            x1, y1, x2, y2 = last_rectangle
-            # Center of rectangle
-            text_x = (x1 + x2) // 2
-            text_y = (y1 + y2) // 2
-            
-            # Get text size to center it properly
-            bbox = canvas_draw.textbbox((0, 0), text, font=font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-            
-            # Adjust to center the text
-            text_x -= text_width // 2
-            text_y -= text_height // 2
-        else:
-            # Default to canvas center if no rectangle
-            text_x, text_y = 300, 280
+        # Encode and save in the worker pool; the lock is already released
+        await ctx.report_progress(1, 2, f"Text '{text}' drawn, exporting")
+        # Unique per server process and session; only the canvas id reaches the prompt
+        name = f"drawing_result_{os.getpid()}_{canvas.scope}_{canvas_id}"
+        exported = await exporter.export(snapshot, name)
+        await ctx.report_progress(2, 2, f"Exported {len(exported.data)} bytes")
         
-        canvas_draw.text((text_x, text_y), text, fill='black', font=font)
+        log(f"Text added and image exported to {exported.path}")
         
-        # Save and open the image
-        output_path = "/tmp/drawing_result.png"
-        canvas_image.save(output_path)
+        saved = f" Exported {canvas_id} to {exporter.output_dir}." if exported.path else ""
+        content = [
+            TextContent(
+                type="text",
+                text=f"Text '{text}' added successfully.{saved}"
+            )
+        ]
+        if exporter.return_image:
+            content.append(Image(data=exported.data, format=exported.format))
+        return content
+    
+    except Exception as e:
+        log(f"Error adding text: {e}")
+        return [
+            TextContent(
+                type="text",
+                text=f"Error: {str(e)}"
+            )
+        ]
+
+@tool()
+async def draw_batch(canvas_id: str, ops: list[dict], ctx: Context) -> dict:
+    """Draw many shapes in one call. Each op is a dict with "op" set to one of:
+    rectangle/ellipse (x1, y1, x2, y2, optional outline, fill, width),
+    line (points=[[x, y], ...], optional color, width),
+    text (x, y, text, optional color, size, anchor; anchor "mm" centres the text on x, y),
+    fill (color, optional x, y to flood fill from; fills the whole canvas otherwise)"""
+    try:
+        canvas = canvases.get(canvas_id, ctx.session)
+        # Validate everything first so a bad op leaves the canvas untouched
+        try:
+            parsed = canvas.display_list.parse(ops)
+        except ValidationError as e:
+            raise ValueError("; ".join(f"op {err['loc'][0] if err['loc'] else '?'}: {err['msg']}"
+                                       for err in e.errors())) from None
         
-        # Open in Preview
-        subprocess.run(['open', output_path])
+        async with canvas.lock:
+            for start in range(0, len(parsed), BATCH_CHUNK):
+                canvas.apply(parsed[start:start + BATCH_CHUNK])
+                done = min(start + BATCH_CHUNK, len(parsed))
+                # Progress doubles as a yield point so other calls are served
+                await ctx.report_progress(done, len(parsed), f"Drew {done}/{len(parsed)} shapes")
         
-        log("Text added and image displayed successfully")
+        log(f"Drew {len(parsed)} ops on {canvas_id}")
         
         return {
             "content": [
                 TextContent(
                     type="text",
-                    text=f"Text '{text}' added successfully. Image opened in Preview."
+                    text=f"Drew {len(parsed)} shapes ({len(canvas.display_list)} on canvas)"
                 )
             ]
         }
     
     except Exception as e:
-        log(f"Error adding text: {e}")
+        log(f"Error in draw_batch: {e}")
         return {
             "content": [
                 TextContent(
@@ -313,9 +359,56 @@ async def add_text_in_drawing_app(text: str) -> dict:
             ]
         }
 
+
+@tool()
+async def get_display_list(canvas_id: str, ctx: Context) -> dict:
+    """Return every operation drawn on a canvas, replayable with draw_batch"""
+    canvas = canvases.get(canvas_id, ctx.session)
+    return canvas.display_list.to_json()
+
+
+@tool()
+async def render_canvas(canvas_id: str, ctx: Context, scale: float = 1.0) -> Image:
+    """Re-render a canvas from its display list at another scale"""
+    if not 0 < scale <= 4:
+        raise ValueError("scale must be between 0 and 4")
+    canvas = canvases.get(canvas_id, ctx.session)
+    width, height = canvas.display_list.size
+    if width * height * scale * scale > MAX_RENDER_PIXELS:
+        largest = math.sqrt(MAX_RENDER_PIXELS / (width * height))
+        raise ValueError(f"A {width}x{height} canvas can be rendered at scale {largest:.2f} "
+                         f"at most ({MAX_RENDER_PIXELS} pixels)")
+    async with canvas.lock:
+        snapshot = canvas.display_list.copy()
+    # Rendering and encoding are CPU work; keep them off the event loop
+    image = await asyncio.to_thread(snapshot.render, scale)
+    return Image(data=await exporter.encode_async(image), format=exporter.format)
+
+
 if __name__ == "__main__":
-    print(f"[MAC-SERVER] Starting Mac Drawing MCP Server...", file=sys.stderr)
+    parser = argparse.ArgumentParser(description="Drawing MCP server")
+    parser.add_argument("--transport", choices=["stdio", "streamable-http", "sse"],
+                        default=os.getenv("MCP_TRANSPORT", "stdio"),
+                        help="stdio for one client; streamable-http or sse for a shared service")
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", 8000)))
+    args = parser.parse_args()
+
+    print(f"[MAC-SERVER] Starting Mac Drawing MCP Server ({args.transport})...", file=sys.stderr)
    
-    print(f"[MAC-SERVER] Screen size: {pyautogui.size()}", file=sys.stderr)
+    if config.HEADLESS:
+        print(f"[MAC-SERVER] Headless, canvas {config.CANVAS_WIDTH}x{config.CANVAS_HEIGHT}",
+              file=sys.stderr)
+    else:
+        print(f"[MAC-SERVER] Screen size: {config.screen_size()}", file=sys.stderr)
     
-    mcp.run()
\ No newline at end of file
+    if args.transport != "stdio":
+        mcp.settings.host = args.host
+        mcp.settings.port = args.port
+        path = mcp.settings.sse_path if args.transport == "sse" else mcp.settings.streamable_http_path
+        print(f"[MAC-SERVER] Listening on http://{args.host}:{args.port}{path}", file=sys.stderr)
+    try:
+        mcp.run(transport=args.transport)
+    finally:
+        tracer.flush()
+        tracer.print_summary()
@@ -0,0 +1,90 @@
+"""
+Canvas export off the event loop.
+
+Encoding a canvas and writing it to disk are blocking PIL and file work, so
+they run in a small thread pool while the MCP server keeps answering other
+calls. Settings come from the environment:
+
+    DRAWING_EXPORT_FORMAT   png (default) or webp
+    DRAWING_EXPORT_DIR      where files go, default /tmp; empty for no file
+    DRAWING_COMPRESS_LEVEL  PNG zlib level 0-9, default 6
+    DRAWING_QUALITY         WebP quality 1-100, default 80 (100 = lossless)
+    DRAWING_RETURN_IMAGE    1 to also return the encoded image to the client
+    DRAWING_VIEWER          command to open the file with, e.g. "open" on macOS
+"""
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+FORMATS = {"png": "PNG", "webp": "WEBP"}
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="export")
+
+
+@dataclass
+class Exported:
+    data: bytes
+    format: str
+    path: str | None = None
+
+
+@dataclass
+class Exporter:
+    format: str = "png"
+    output_dir: str | None = "/tmp"
+    compress_level: int = 6
+    quality: int = 80
+    return_image: bool = False
+    viewer: str | None = None
+
+    def __post_init__(self):
+        if self.format not in FORMATS:
+            raise ValueError(f"Unsupported export format {self.format!r}")
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            format=os.getenv("DRAWING_EXPORT_FORMAT", "png").lower(),
+            output_dir=os.getenv("DRAWING_EXPORT_DIR", "/tmp") or None,
+            compress_level=int(os.getenv("DRAWING_COMPRESS_LEVEL", 6)),
+            quality=int(os.getenv("DRAWING_QUALITY", 80)),
+            return_image=os.getenv("DRAWING_RETURN_IMAGE", "0") == "1",
+            viewer=os.getenv("DRAWING_VIEWER", "open" if sys.platform == "darwin" else "") or None,
+        )
+
+    def encode(self, image):
+        """Encoded bytes of `image` (blocking)"""
+        buffer = io.BytesIO()
+        if self.format == "png":
+            image.save(buffer, format="PNG", compress_level=self.compress_level)
+        else:
+            image.save(buffer, format="WEBP", quality=self.quality, lossless=self.quality >= 100)
+        return buffer.getvalue()
+
+    def _encode_and_write(self, image, name):
+        data = self.encode(image)
+        path = None
+        if self.output_dir:
+            path = os.path.join(self.output_dir, f"{name}.{self.format}")
+            with open(path, "wb") as f:
+                f.write(data)
+        return Exported(data, self.format, path)
+
+    async def export(self, image, name):
+        """Encode (and save) a snapshot of `image` in the worker pool"""
+        loop = asyncio.get_running_loop()
+        exported = await loop.run_in_executor(_executor, self._encode_and_write, image, name)
+        if exported.path and self.viewer:
+            # Fire and forget: the viewer must never hold up the tool call
+            await asyncio.create_subprocess_exec(
+                self.viewer, exported.path,
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+            )
+        return exported
+
+    async def encode_async(self, image):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, self.encode, image)
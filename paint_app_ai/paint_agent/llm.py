@@ -0,0 +1,187 @@
+"""
+LLM adapters for the drawing agent.
+
+The agent loop talks to a model through `generate(system_prompt, messages,
+tools)` and gets back an `LLMTurn`: optional text plus zero or more
+structured `ToolCall`s. `GeminiLLM` uses Gemini's native function calling
+(several calls per turn); `ScriptedLLM` replays canned turns so the loop can
+be benchmarked offline. Adapters may also offer `prepare()`, which the agent
+awaits while tools run, to do request-building work ahead of `generate()`.
+
+Messages are plain dicts, independent of any provider:
+    {"role": "user", "text": ...}
+    {"role": "model", "turn": LLMTurn}
+    {"role": "tool", "results": [(ToolCall, result_text), ...]}
+"""
+import asyncio
+import itertools
+from dataclasses import dataclass, field
+from typing import Any
+
+from google.genai import types
+
+DEFAULT_MODEL = "gemini-2.0-flash-exp"
+
+
+@dataclass
+class ToolCall:
+    name: str
+    args: dict
+    id: str | None = None
+
+
+@dataclass
+class LLMTurn:
+    text: str = ""
+    tool_calls: list[ToolCall] = field(default_factory=list)
+    raw: Any = None  # provider-native message, replayed verbatim in history
+
+
+async def generate_with_timeout(client, contents, config=None, model=DEFAULT_MODEL, timeout=15):
+    """Generate content with a timeout"""
+    print("Starting LLM generation...")
+    try:
+        response = await asyncio.wait_for(
+            client.aio.models.generate_content(model=model, contents=contents, config=config),
+            timeout=timeout,
+        )
+        print("LLM generation completed")
+        return response
+    except asyncio.TimeoutError:
+        print("LLM generation timed out!")
+        raise
+    except Exception as e:
+        print(f"Error in LLM generation: {e}")
+        raise
+
+
+class GeminiLLM:
+    """Gemini with native function calling"""
+
+    def __init__(self, client, model=DEFAULT_MODEL, timeout=15):
+        self.client = client
+        self.model = model
+        self.timeout = timeout
+        self.calls = 0
+        self._config = None
+        self._config_key = None
+        self._converted = {}
+
+    def _get_config(self, system_prompt, tools):
+        """Build the tool declarations once and reuse them for every turn"""
+        key = (system_prompt, id(tools))
+        if self._config_key != key:
+            declarations = [
+                types.FunctionDeclaration(
+                    name=tool["name"],
+                    description=tool.get("description") or "",
+                    parameters_json_schema=tool.get("parameters") or {"type": "object",
+                                                                      "properties": {}},
+                )
+                for tool in tools
+            ]
+            self._config = types.GenerateContentConfig(
+                system_instruction=system_prompt,
+                tools=[types.Tool(function_declarations=declarations)],
+                # We run the tools ourselves, over MCP
+                automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True),
+            )
+            self._config_key = key
+        return self._config
+
+    def _convert(self, message):
+        """One neutral message as a types.Content, converted once per message"""
+        key = ("user", message["text"]) if message["role"] == "user" else id(message)
+        cached = self._converted.get(key)
+        if cached is not None and (message["role"] == "user" or cached[0] is message):
+            return cached[1]
+        if message["role"] == "user":
+            content = types.Content(role="user", parts=[types.Part(text=message["text"])])
+        elif message["role"] == "model":
+            turn = message["turn"]
+            if turn.raw is not None:
+                content = turn.raw
+            else:
+                parts = [types.Part(text=turn.text)] if turn.text else []
+                parts += [types.Part.from_function_call(name=c.name, args=c.args)
+                          for c in turn.tool_calls]
+                content = types.Content(role="model", parts=parts)
+        else:
+            content = types.Content(role="user", parts=[
+                types.Part.from_function_response(name=call.name, response={"result": result})
+                for call, result in message["results"]
+            ])
+        if len(self._converted) > 512:
+            self._converted.clear()
+        # The message is kept alive with its entry so its id cannot be reused
+        self._converted[key] = (message, content)
+        return content
+
+    def _contents(self, messages):
+        contents = []
+        for message in messages:
+            contents.append(self._convert(message))
+            # Consecutive messages from the same side become one turn
+            if len(contents) > 1 and contents[-1].role == contents[-2].role:
+                last = contents.pop()
+                contents[-1] = types.Content(role=last.role,
+                                             parts=list(contents[-1].parts) + list(last.parts))
+        return contents
+
+    async def prepare(self, system_prompt, messages, tools):
+        """Build the config and convert known history while tools are still running"""
+        self._get_config(system_prompt, tools)
+        for message in messages:
+            self._convert(message)
+
+    async def generate(self, system_prompt, messages, tools):
+        self.calls += 1
+        response = await generate_with_timeout(
+            self.client, self._contents(messages), self._get_config(system_prompt, tools),
+            model=self.model, timeout=self.timeout,
+        )
+        content = response.candidates[0].content if response.candidates else None
+        turn = LLMTurn(raw=content)
+        for part in (content.parts if content and content.parts else []):
+            if part.function_call:
+                turn.tool_calls.append(ToolCall(
+                    name=part.function_call.name,
+                    args=dict(part.function_call.args or {}),
+                    id=part.function_call.id,
+                ))
+            elif part.text:
+                turn.text += part.text
+        return turn
+
+
+class ScriptedLLM:
+    """Fake LLM that returns pre-written turns after a fixed delay
+
+    `prepare_cost` models client-side request building: each call pays it
+    unless `prepare()` already did, overlapped with tool execution.
+    """
+
+    def __init__(self, turns, latency=0.0, prepare_cost=0.0):
+        self.turns = list(turns)
+        self.latency = latency
+        self.prepare_cost = prepare_cost
+        self._prepared = False
+        self.calls = 0
+        self.prompts = []  # (system_prompt, messages) as seen by each call
+        self._ids = itertools.count()
+
+    async def generate(self, system_prompt, messages, tools):
+        self.prompts.append((system_prompt, list(messages)))
+        await asyncio.sleep(self.latency + (0 if self._prepared else self.prepare_cost))
+        self._prepared = False
+        self.calls += 1
+        if self.calls > len(self.turns):
+            return LLMTurn(text="Task completed")
+        turn = self.turns[self.calls - 1]
+        for call in turn.tool_calls:
+            call.id = call.id or f"call_{next(self._ids)}"
+        return turn
+
+    async def prepare(self, system_prompt, messages, tools):
+        await asyncio.sleep(self.prepare_cost)
+        self._prepared = True
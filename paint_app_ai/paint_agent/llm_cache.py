@@ -0,0 +1,204 @@
+"""
+Response cache, request coalescing and record/replay for LLM calls.
+
+`CachedLLM` wraps any adapter from llm.py. Responses are keyed by a hash of
+the model name and the full prompt (system prompt, messages, tools):
+
+- an in-memory LRU answers repeats within a process
+- an optional SQLite file answers repeats across runs
+- entries older than `ttl` seconds are ignored
+- identical requests in flight at the same time share one upstream call
+
+Modes:
+    live    use the cache, call the model on a miss (default)
+    record  as live, and append every response, cached or not, to a JSONL
+            recording
+    replay  answer only from the recording, never call the model
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+
+from google.genai import types
+
+from llm import LLMTurn, ToolCall
+
+
+class ReplayMissError(KeyError):
+    """A replayed run asked for a prompt that was never recorded"""
+
+
+def _message_dict(message):
+    if message["role"] == "user":
+        return {"role": "user", "text": message["text"]}
+    if message["role"] == "model":
+        turn = message["turn"]
+        return {"role": "model", "text": turn.text,
+                "calls": [[c.name, c.args] for c in turn.tool_calls]}
+    return {"role": "tool", "results": [[c.name, c.args, r] for c, r in message["results"]]}
+
+
+def prompt_key(model, system_prompt, messages, tools):
+    """Stable hash of everything that determines the model's answer"""
+    payload = json.dumps(
+        [model, system_prompt, [_message_dict(m) for m in messages], tools],
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def turn_to_json(turn):
+    raw = turn.raw.model_dump(mode="json", exclude_none=True) if turn.raw is not None else None
+    return json.dumps({
+        "text": turn.text,
+        "tool_calls": [{"name": c.name, "args": c.args, "id": c.id} for c in turn.tool_calls],
+        "raw": raw,
+    })
+
+
+def turn_from_json(data):
+    data = json.loads(data)
+    return LLMTurn(
+        text=data["text"],
+        tool_calls=[ToolCall(**c) for c in data["tool_calls"]],
+        raw=types.Content.model_validate(data["raw"]) if data["raw"] else None,
+    )
+
+
+class ResponseCache:
+    """In-memory LRU in front of an optional SQLite table, with a TTL"""
+
+    def __init__(self, max_entries=1024, sqlite_path=None, ttl=24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory = OrderedDict()  # key -> (created, json)
+        self._db = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses "
+                             "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)")
+            self._db.commit()
+
+    def _fresh(self, created):
+        return self.ttl is None or time.time() - created <= self.ttl
+
+    def get(self, key):
+        entry = self._memory.get(key)
+        if entry is not None:
+            if self._fresh(entry[0]):
+                self._memory.move_to_end(key)
+                return turn_from_json(entry[1])
+            del self._memory[key]
+        if self._db is not None:
+            row = self._db.execute("SELECT value, created FROM responses WHERE key = ?",
+                                   (key,)).fetchone()
+            if row and self._fresh(row[1]):
+                self._remember(key, row[1], row[0])
+                return turn_from_json(row[0])
+        return None
+
+    def put(self, key, turn):
+        value, created = turn_to_json(turn), time.time()
+        self._remember(key, created, value)
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                             (key, value, created))
+            self._db.commit()
+
+    def _remember(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+
+
+class CachedLLM:
+    """Cache, coalesce and optionally record/replay an LLM adapter's calls"""
+
+    def __init__(self, llm, cache=None, mode="live", recording_path=None):
+        if mode not in ("live", "record", "replay"):
+            raise ValueError(f"Unknown cache mode {mode!r}")
+        if mode != "live" and not recording_path:
+            raise ValueError(f"Mode {mode!r} needs a recording_path")
+        self.llm = llm
+        self.cache = cache or ResponseCache()
+        self.mode = mode
+        self.recording_path = recording_path
+        self.model = getattr(llm, "model", type(llm).__name__)
+        self.calls = 0       # generate() calls made by the agent
+        self.upstream = 0    # calls that actually reached the model
+        self.hits = 0
+        self.coalesced = 0
+        self._in_flight = {}
+        self._recording = {}
+        self._recorded = set()
+        if mode == "replay":
+            with open(recording_path) as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self._recording[entry["key"]] = entry["turn"]
+
+    async def generate(self, system_prompt, messages, tools):
+        self.calls += 1
+        key = prompt_key(self.model, system_prompt, messages, tools)
+
+        if self.mode == "replay":
+            if key not in self._recording:
+                raise ReplayMissError(f"No recorded response for prompt {key[:12]}")
+            self.hits += 1
+            return turn_from_json(self._recording[key])
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            # A replay has no cache to fall back on: it needs every turn of the run
+            self._record(key, cached)
+            return cached
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+
+        # Shielded so a cancelled caller does not cancel the call others are waiting on
+        task = asyncio.ensure_future(self._fetch(key, system_prompt, messages, tools))
+        self._in_flight[key] = task
+        return await asyncio.shield(task)
+
+    async def prepare(self, system_prompt, messages, tools):
+        if self.mode != "replay" and hasattr(self.llm, "prepare"):
+            await self.llm.prepare(system_prompt, messages, tools)
+
+    async def _fetch(self, key, system_prompt, messages, tools):
+        try:
+            self.upstream += 1
+            turn = await self.llm.generate(system_prompt, messages, tools)
+            self.cache.put(key, turn)
+            self._record(key, turn)
+            return turn
+        finally:
+            self._in_flight.pop(key, None)
+
+    def _record(self, key, turn):
+        if self.mode != "record" or key in self._recorded:
+            return
+        self._recorded.add(key)
+        with open(self.recording_path, "a") as f:
+            f.write(json.dumps({"key": key, "turn": turn_to_json(turn)}) + "\n")
+
+    @staticmethod
+    def from_env(llm, sqlite_path=".llm_cache.sqlite"):
+        """Configure from LLM_CACHE_MODE / LLM_RECORDING / LLM_CACHE_TTL"""
+        mode = os.getenv("LLM_CACHE_MODE", "live")
+        cache = ResponseCache(sqlite_path=sqlite_path,
+                              ttl=float(os.getenv("LLM_CACHE_TTL", 24 * 3600)))
+        return CachedLLM(llm, cache, mode=mode,
+                         recording_path=os.getenv("LLM_RECORDING", "llm_recording.jsonl"))
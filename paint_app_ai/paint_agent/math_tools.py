@@ -0,0 +1,257 @@
+"""
+Math helpers for the drawing server: NumPy vector ops, arbitrary-precision
+integers with input-size guards, and worker processes for the heavy cases.
+
+Small inputs are computed inline. Anything that could take long (huge
+factorials, powers, Fibonacci numbers) runs in `HeavyPool`, one worker
+process per call, killed if the call overruns its timeout, so one expensive
+request can neither freeze the server's event loop nor take down other
+clients' calls.
+"""
+import asyncio
+import math
+import multiprocessing
+import os
+import sys
+
+# Guards: refuse work whose result alone would be unreasonably large
+MAX_VECTOR_LEN = 1_000_000
+MAX_RESULT_DIGITS = 1_000_000
+MAX_FACTORIAL_N = 200_000
+MAX_FIBONACCI_N = 5_000_000
+MAX_FIBONACCI_LIST = 10_000
+
+# Above these, run in the process pool instead of inline
+INLINE_DIGITS = 20_000
+INLINE_FACTORIAL_N = 2_000
+INLINE_FIBONACCI_N = 50_000
+
+DEFAULT_TIMEOUT = 10.0
+
+# Digits per leaf of decimal_str(), below the interpreter's int -> str limit
+_STR_CHUNK = 4000
+
+# NumPy ufunc / function names; NumPy itself is imported on first use so it
+# does not add to server start-up
+ELEMENTWISE = ("add", "subtract", "multiply", "divide", "power",
+               "exp", "log", "sqrt", "sin", "cos", "tan", "abs")
+BINARY = {"add", "subtract", "multiply", "divide", "power"}
+REDUCTIONS = ("sum", "mean", "min", "max", "prod", "std", "norm", "exp_sum")
+# Reductions that are defined for an empty vector; the others raise
+EMPTY_RESULTS = {"sum": 0.0, "exp_sum": 0.0, "norm": 0.0, "prod": 1.0}
+
+
+def _reduction(np, op):
+    if op == "norm":
+        return np.linalg.norm
+    if op == "exp_sum":
+        return lambda v: np.sum(np.exp(v))
+    return getattr(np, op)
+
+
+def as_vector(values, name="values"):
+    import numpy as np
+    if len(values) > MAX_VECTOR_LEN:
+        raise ValueError(f"{name} has {len(values)} elements, limit is {MAX_VECTOR_LEN}")
+    return np.asarray(values, dtype=np.float64)
+
+
+def _finite(array):
+    """JSON has no NaN/inf; report them by name"""
+    return [x if math.isfinite(x) else str(x) for x in array.tolist()]
+
+
+def elementwise(op, a, b=None):
+    if op not in ELEMENTWISE:
+        raise ValueError(f"Unknown op {op!r}; choose from {', '.join(ELEMENTWISE)}")
+    import numpy as np
+    fn = getattr(np, op)
+    x = as_vector(a, "a")
+    if op in BINARY:
+        if b is None:
+            raise ValueError(f"{op} needs a second vector b")
+        y = as_vector(b, "b")
+        if y.size not in (1, x.size):
+            raise ValueError(f"a has {x.size} elements but b has {y.size}")
+        with np.errstate(all="ignore"):
+            return _finite(fn(x, y))
+    with np.errstate(all="ignore"):
+        return _finite(fn(x))
+
+
+def reduce(op, values):
+    if op not in REDUCTIONS:
+        raise ValueError(f"Unknown reduction {op!r}; choose from {', '.join(REDUCTIONS)}")
+    import numpy as np
+    x = as_vector(values)
+    if x.size == 0:
+        if op in EMPTY_RESULTS:
+            return EMPTY_RESULTS[op]
+        raise ValueError(f"{op} of an empty vector is undefined")
+    with np.errstate(all="ignore"):
+        result = float(_reduction(np, op)(x))
+    return result if math.isfinite(result) else str(result)
+
+
+def power_digits(a, b):
+    """Approximate number of decimal digits in a ** b"""
+    if b < 0:
+        raise ValueError("Negative exponents are not supported for integers")
+    return 1 if a in (0, 1, -1) or b == 0 else int(b * math.log10(abs(a))) + 1
+
+
+def check_power(a, b):
+    digits = power_digits(a, b)
+    if digits > MAX_RESULT_DIGITS:
+        raise ValueError(f"{a}**{b} has about {digits} digits, limit is {MAX_RESULT_DIGITS}")
+    return digits
+
+
+def check_factorial(n):
+    if n < 0:
+        raise ValueError("Factorial is not defined for negative numbers")
+    if n > MAX_FACTORIAL_N:
+        raise ValueError(f"factorial({n}) is too large, limit is n={MAX_FACTORIAL_N}")
+
+
+def fibonacci(n):
+    """n-th Fibonacci number by fast doubling: O(log n) big-int multiplications"""
+    if n < 0:
+        raise ValueError("n must be non-negative")
+    if n > MAX_FIBONACCI_N:
+        raise ValueError(f"fibonacci({n}) is too large, limit is n={MAX_FIBONACCI_N}")
+    a, b = 0, 1  # F(k), F(k+1)
+    for bit in bin(n)[2:]:
+        c = a * (2 * b - a)   # F(2k)
+        d = a * a + b * b     # F(2k+1)
+        a, b = (d, c + d) if bit == "1" else (c, d)
+    return a
+
+
+def fibonacci_list(n):
+    if n > MAX_FIBONACCI_LIST:
+        raise ValueError(f"Listing {n} Fibonacci numbers is too much, limit is {MAX_FIBONACCI_LIST}")
+    sequence = [0, 1]
+    for _ in range(2, n):
+        sequence.append(sequence[-1] + sequence[-2])
+    return sequence[:max(n, 0)]
+
+
+def decimal_str(n):
+    """Decimal text of any int, without lifting the interpreter's int -> str limit
+
+    sys.set_int_max_str_digits() guards every str(int) in the process, so
+    results (already bounded by MAX_RESULT_DIGITS) are split by powers of ten
+    into chunks that str() accepts.
+    """
+    if n < 0:
+        return "-" + decimal_str(-n)
+    if n.bit_length() <= _STR_CHUNK * 3:  # under 10 ** _STR_CHUNK
+        return str(n)
+    powers = [10 ** _STR_CHUNK]  # powers[i] = 10 ** (_STR_CHUNK * 2 ** i)
+    while powers[-1].bit_length() * 2 <= n.bit_length():
+        powers.append(powers[-1] * powers[-1])
+
+    def convert(m, i, pad):
+        if i < 0:
+            return str(m).zfill(_STR_CHUNK) if pad else str(m)
+        high, low = divmod(m, powers[i])
+        if high or pad:
+            return convert(high, i - 1, pad) + convert(low, i - 1, True)
+        return convert(low, i - 1, False)
+
+    return convert(n, len(powers) - 1, False)
+
+
+def int_result(n):
+    """`n` itself if it can be printed as an int, else its decimal string"""
+    limit = sys.get_int_max_str_digits()
+    if not limit or n.bit_length() <= (limit - 1) * 3:  # under 10 ** (limit - 1)
+        return n
+    return decimal_str(n)
+
+
+# Pool entry points. They return decimal strings because converting a huge
+# int to text is as slow as computing it, and must not happen on the event loop
+def power_str(a, b):
+    return decimal_str(a ** b)
+
+
+def factorial_str(n):
+    return decimal_str(math.factorial(n))
+
+
+def fibonacci_str(n):
+    return decimal_str(fibonacci(n))
+
+
+def _call_in_worker(conn, fn, args):
+    """Body of a HeavyPool worker process: send back (ok, result or exception)"""
+    try:
+        conn.send((True, fn(*args)))
+    except Exception as e:
+        conn.send((False, e))
+    finally:
+        conn.close()
+
+
+def _wait_for_result(conn, timeout):
+    """Block until the worker answers; (False, None) if `timeout` runs out first"""
+    if not conn.poll(timeout):
+        return False, None
+    return True, conn.recv()
+
+
+class HeavyPool:
+    """Runs each heavy call in a worker process of its own, with a timeout
+
+    A call that overruns is stopped by killing its process only, so other
+    clients' calls running at the same time are not affected. At most
+    `workers` calls run at once; further calls wait for a slot.
+
+    Workers come from a fork server: forking the server itself would copy the
+    stdin lock held by the stdio transport's reader thread, and a child that
+    touches stdin would hang on it.
+    """
+
+    def __init__(self, workers=None, timeout=DEFAULT_TIMEOUT):
+        self.workers = workers or min(2, os.cpu_count() or 1)
+        self.timeout = timeout
+        self.timeouts = 0
+        self._context = multiprocessing.get_context("forkserver")
+        # Workers fork from a server that already imported this module: ~10 ms
+        # per call instead of ~60 ms (takes effect if the fork server is not yet running)
+        self._context.set_forkserver_preload([__name__])
+        self._slots = asyncio.Semaphore(self.workers)
+        self._running = set()
+
+    async def run(self, fn, *args, timeout=None):
+        timeout = timeout or self.timeout
+        async with self._slots:
+            receiver, sender = self._context.Pipe(duplex=False)
+            process = self._context.Process(target=_call_in_worker, args=(sender, fn, args),
+                                            daemon=True)
+            process.start()
+            sender.close()
+            self._running.add(process)
+            try:
+                answered, reply = await asyncio.to_thread(_wait_for_result, receiver, timeout)
+            except EOFError:
+                raise RuntimeError(f"{fn.__name__} worker exited with code {process.exitcode}")
+            finally:
+                # Also reached when the caller is cancelled: never leave the worker running
+                process.kill()
+                process.join()
+                receiver.close()
+                self._running.discard(process)
+        if not answered:
+            self.timeouts += 1
+            raise TimeoutError(f"{fn.__name__} took longer than {timeout:g}s and was stopped")
+        ok, value = reply
+        if not ok:
+            raise value
+        return value
+
+    def close(self):
+        for process in list(self._running):
+            process.kill()
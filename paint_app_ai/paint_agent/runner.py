@@ -0,0 +1,190 @@
+"""
+Run many agent tasks concurrently over a pool of warm MCP sessions.
+
+Each session costs a server subprocess and `initialize()`, and the tool list
+is discovered once per server identity. `SessionPool` pays that once per
+slot at start-up; tasks then borrow a ready session from the pool, run the
+agent with their own `TaskState`, and give the session back:
+
+    async with SessionPool(lambda: stdio_session(params), size=4) as pool:
+        states = await run_tasks(pool, queries, lambda: GeminiLLM(client))
+"""
+import asyncio
+import sys
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+
+import httpx
+from mcp import ClientSession, StdioServerParameters, stdio_client
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+
+from agent import run_agent
+from tool_registry import discover_tools
+
+
+@asynccontextmanager
+async def stdio_session(server_params):
+    """Spawn a stdio MCP server and yield an initialised session to it"""
+    async with stdio_client(server_params) as (read, write):
+        async with ClientSession(read, write) as session:
+            # Kept for discover_tools(), which caches tools per server identity
+            session.init_result = await session.initialize()
+            yield session
+
+
+def keepalive_http_client(headers=None, timeout=None, auth=None):
+    """httpx client for MCP over HTTP that keeps its connections open between calls"""
+    return httpx.AsyncClient(
+        headers=headers, auth=auth, follow_redirects=True,
+        timeout=timeout or httpx.Timeout(30.0, read=300.0),
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16,
+                            keepalive_expiry=300),
+    )
+
+
+@asynccontextmanager
+async def http_session(url, transport="streamable-http"):
+    """Initialised session to a long-running MCP server over streamable HTTP or SSE"""
+    if transport == "sse":
+        connection = sse_client(url, httpx_client_factory=keepalive_http_client)
+    else:
+        connection = streamablehttp_client(url, httpx_client_factory=keepalive_http_client)
+    async with connection as streams:
+        read, write = streams[0], streams[1]
+        async with ClientSession(read, write) as session:
+            session.init_result = await session.initialize()
+            yield session
+
+
+def connect(transport="stdio", target="drawing_mcp_server.py"):
+    """Session factory for SessionPool: a script path for stdio, a URL otherwise"""
+    if transport == "stdio":
+        params = StdioServerParameters(command=sys.executable, args=[target])
+        return lambda: stdio_session(params)
+    if transport in ("streamable-http", "sse"):
+        return lambda: http_session(target, transport)
+    raise ValueError(f"Unknown transport {transport!r}")
+
+
+@dataclass
+class PooledSession:
+    session: ClientSession
+    tools: object  # ToolRegistry
+    slot: int
+    tasks_run: int = 0
+
+
+class SessionPool:
+    """Fixed-size pool of initialised MCP sessions with their tool lists"""
+
+    def __init__(self, connect, size=4):
+        self.connect = connect  # () -> async context manager yielding a ClientSession
+        self.size = size
+        self.startup_time = 0.0
+        self._stack = AsyncExitStack()
+        self._idle = asyncio.Queue()
+        self._all = []
+
+    async def _open(self, slot):
+        session = await self._stack.enter_async_context(self.connect())
+        return PooledSession(session, await discover_tools(session), slot)
+
+    async def start(self):
+        start = time.perf_counter()
+        # Sessions are entered one by one: the exit stack must unwind in this task
+        for slot in range(self.size):
+            pooled = await self._open(slot)
+            self._all.append(pooled)
+            self._idle.put_nowait(pooled)
+        self.startup_time = time.perf_counter() - start
+        return self
+
+    async def close(self):
+        await self._stack.aclose()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @asynccontextmanager
+    async def session(self):
+        """Borrow a session for the duration of one task"""
+        pooled = await self._idle.get()
+        try:
+            yield pooled
+        finally:
+            pooled.tasks_run += 1
+            self._idle.put_nowait(pooled)
+
+
+@dataclass
+class TaskState:
+    """Everything one task owns; nothing is shared between tasks"""
+    task_id: int
+    query: str
+    slot: int | None = None
+    result: object = None  # AgentResult
+    error: str | None = None
+    queued_at: float = field(default_factory=time.perf_counter)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def wait(self):
+        return self.started_at - self.queued_at
+
+    @property
+    def elapsed(self):
+        return self.finished_at - self.started_at
+
+
+async def _worker(pool, queue, make_llm, agent_kwargs):
+    while True:
+        state = await queue.get()
+        try:
+            async with pool.session() as pooled:
+                state.slot = pooled.slot
+                state.started_at = time.perf_counter()
+                try:
+                    state.result = await run_agent(pooled.session, make_llm(), state.query,
+                                                   pooled.tools, **agent_kwargs)
+                except Exception as e:
+                    state.error = f"{type(e).__name__}: {e}"
+                state.finished_at = time.perf_counter()
+        finally:
+            queue.task_done()
+
+
+async def run_tasks(pool, queries, make_llm, concurrency=None, **agent_kwargs):
+    """Run every query through the agent, at most `concurrency` at a time"""
+    queue = asyncio.Queue()
+    states = [TaskState(i, query) for i, query in enumerate(queries)]
+    for state in states:
+        queue.put_nowait(state)
+
+    workers = [asyncio.create_task(_worker(pool, queue, make_llm, agent_kwargs))
+               for _ in range(concurrency or pool.size)]
+    await queue.join()
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    return states
+
+
+def report(states, elapsed, startup_time=0.0):
+    """Print per-run throughput and latency figures"""
+    done = [s for s in states if s.error is None]
+    latencies = sorted(s.elapsed for s in states)
+    print(f"\nTasks: {len(states)} ({len(states) - len(done)} failed) in {elapsed:.2f}s "
+          f"(+ {startup_time:.2f}s pool start-up)")
+    print(f"Throughput: {len(states) / elapsed:.2f} tasks/s")
+    if latencies:
+        print(f"Task latency p50 {latencies[len(latencies) // 2]:.2f}s, "
+              f"max {latencies[-1]:.2f}s; max queue wait {max(s.wait for s in states):.2f}s")
+    for state in states:
+        if state.error:
+            print(f"  task {state.task_id} failed: {state.error}")
@@ -0,0 +1,90 @@
+import asyncio
+import math
+import sys
+
+import pytest
+
+import math_tools
+from math_tools import HeavyPool, decimal_str, fibonacci, fibonacci_list, int_result
+
+
+@pytest.fixture
+def unlimited_str():
+    """str() of any int, to check results against; restores the default guard"""
+    limit = sys.get_int_max_str_digits()
+    sys.set_int_max_str_digits(0)
+    yield str
+    sys.set_int_max_str_digits(limit)
+
+
+@pytest.mark.parametrize("n", [0, 7, -7, 10 ** 4000, 10 ** 4000 - 1, 10 ** 12000,
+                               -(3 ** 20000), math.factorial(3000), 7 ** 100_000],
+                         ids=["0", "7", "-7", "10^4000", "10^4000-1", "10^12000",
+                              "-3^20000", "3000!", "7^100000"])
+def test_decimal_str_matches_str(n, unlimited_str):
+    text = decimal_str(n)
+    assert text == unlimited_str(n)
+
+
+def test_the_process_keeps_the_int_str_guard():
+    assert sys.get_int_max_str_digits() != 0
+    decimal_str(10 ** 20000)
+    assert sys.get_int_max_str_digits() != 0
+
+
+def test_int_result_is_an_int_until_it_cannot_be_printed():
+    assert int_result(2 ** 100) == 2 ** 100
+    big = int_result(math.factorial(2000))  # 5736 digits
+    assert isinstance(big, str) and len(big) == 5736
+
+
+def test_fibonacci_fast_doubling_matches_the_sequence():
+    sequence = fibonacci_list(300)
+    assert sequence[:8] == [0, 1, 1, 2, 3, 5, 8, 13]
+    assert [fibonacci(n) for n in range(300)] == sequence
+    assert fibonacci_list(0) == [] and fibonacci_list(1) == [0]
+
+
+def test_guards():
+    with pytest.raises(ValueError):
+        fibonacci(-1)
+    with pytest.raises(ValueError):
+        fibonacci(math_tools.MAX_FIBONACCI_N + 1)
+    with pytest.raises(ValueError):
+        fibonacci_list(math_tools.MAX_FIBONACCI_LIST + 1)
+    with pytest.raises(ValueError):
+        math_tools.check_power(10, math_tools.MAX_RESULT_DIGITS + 1)
+    with pytest.raises(ValueError):
+        math_tools.check_factorial(-1)
+
+
+def test_empty_reductions():
+    assert math_tools.reduce("exp_sum", []) == 0.0
+    assert math_tools.reduce("sum", []) == 0.0
+    assert math_tools.reduce("prod", []) == 1.0
+    with pytest.raises(ValueError):
+        math_tools.reduce("mean", [])
+
+
+def test_overflow_is_reported_by_name():
+    assert math_tools.reduce("exp_sum", [1000, 1]) == "inf"
+    assert math_tools.elementwise("divide", [1, -1, 0], [0]) == ["inf", "-inf", "nan"]
+
+
+def test_a_timeout_only_stops_its_own_call():
+    async def run():
+        pool = HeavyPool(workers=2)
+        slow = pool.run(math_tools.power_str, 3, 2_000_000, timeout=0.2)
+        other = pool.run(math_tools.factorial_str, 3000, timeout=30)
+        results = await asyncio.gather(slow, other, return_exceptions=True)
+        return pool, results
+
+    pool, (slow, other) = asyncio.run(run())
+    assert isinstance(slow, TimeoutError)
+    assert other == decimal_str(math.factorial(3000))
+    assert pool.timeouts == 1
+
+
+def test_worker_errors_reach_the_caller():
+    with pytest.raises(ValueError, match="non-negative"):
+        asyncio.run(HeavyPool().run(math_tools.fibonacci_str, -1))
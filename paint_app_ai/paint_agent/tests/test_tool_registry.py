@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from mcp.server.fastmcp import FastMCP
+
+import tool_registry
+from tool_registry import ToolArgumentError, ToolRegistry, discover_tools
+
+
+def make_tools():
+    mcp = FastMCP("registry-test")
+
+    @mcp.tool()
+    def add(a: int, b: int) -> int:
+        return a + b
+
+    @mcp.tool()
+    def add_text_in_drawing_app(canvas_id: str, text: str) -> str:
+        return text
+
+    @mcp.tool()
+    def scale(values: list[float], factor: float = 1.0, label: str | None = None) -> list:
+        return values
+
+    return asyncio.run(mcp.list_tools())
+
+
+@pytest.fixture(scope="module")
+def registry():
+    return ToolRegistry(make_tools())
+
+
+def test_numeric_strings_and_whole_floats_become_ints(registry):
+    assert registry.coerce("add", {"a": "5", "b": 5.0}) == {"a": 5, "b": 5}
+
+
+def test_numbers_are_accepted_as_text(registry):
+    args = registry.coerce("add_text_in_drawing_app", {"canvas_id": "canvas-1", "text": 125})
+    assert args == {"canvas_id": "canvas-1", "text": "125"}
+
+
+def test_optional_arguments_are_left_unset(registry):
+    assert registry.coerce("scale", {"values": [1, "2.5"]}) == {"values": [1.0, 2.5]}
+    assert registry.coerce("scale", {"values": [], "label": None}) == {"values": [],
+                                                                       "label": None}
+
+
+@pytest.mark.parametrize("name, args, message", [
+    ("add", {"a": "five", "b": 1}, "a:"),
+    ("add", {"a": 1}, "b: Field required"),
+    ("add", {"a": 1, "b": 2, "c": 3}, "c: Extra inputs"),
+    ("add", {"a": 1.5, "b": 2}, "a:"),
+    ("subtract", {}, "Unknown tool"),
+])
+def test_bad_arguments_are_rejected_before_the_call(registry, name, args, message):
+    with pytest.raises(ToolArgumentError, match=message):
+        registry.coerce(name, args)
+
+
+def test_specs_follow_the_tool_list(registry):
+    assert [spec["name"] for spec in registry.specs] == ["add", "add_text_in_drawing_app",
+                                                         "scale"]
+    assert registry.specs[0]["parameters"]["required"] == ["a", "b"]
+
+
+def test_discovery_is_cached_per_server_identity(monkeypatch):
+    monkeypatch.setattr(tool_registry, "_registries", {})
+    tools = make_tools()
+
+    class Session:
+        def __init__(self, version):
+            self.init_result = SimpleNamespace(
+                serverInfo=SimpleNamespace(name="drawing", version=version))
+            self.calls = 0
+
+        async def list_tools(self):
+            self.calls += 1
+            return SimpleNamespace(tools=tools)
+
+    first, second, upgraded = Session("1.0"), Session("1.0"), Session("2.0")
+    registry = asyncio.run(discover_tools(first))
+    assert asyncio.run(discover_tools(second)) is registry
+    assert asyncio.run(discover_tools(upgraded)) is not registry
+    assert (first.calls, second.calls, upgraded.calls) == (1, 0, 1)
@@ -0,0 +1,93 @@
+"""
+Thumbnails that are cheap to make and cheap to make again.
+
+- JPEGs are decoded with `Image.draft`, which lets libjpeg scale down by
+  1/2, 1/4 or 1/8 while decoding, so a 24-megapixel photo never exists in
+  memory at full size
+- the result is a real PNG or WebP file, not raw pixels
+- results are cached on disk under a key of (path, mtime, file size,
+  thumbnail size, format), so an unchanged file is never decoded twice
+- `thumbnail_batch` spreads many files over a process pool
+"""
+import hashlib
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from PIL import Image as PILImage
+
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "paint_agent_thumbnails")
+FORMATS = {"png": "PNG", "webp": "WEBP"}
+
+
+def cache_key(path, size, fmt):
+    stat = os.stat(path)
+    raw = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{size}|{fmt}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def render_thumbnail(path, size=100, fmt="png"):
+    """Encoded thumbnail of the image at `path`, at most `size` pixels per side"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported thumbnail format {fmt!r}")
+    with PILImage.open(path) as img:
+        if img.format == "JPEG":
+            img.draft("RGB", (size, size))
+        img.thumbnail((size, size))
+        if img.mode not in ("RGB", "RGBA", "L", "LA"):
+            img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info
+                              else "RGB")
+        buffer = BytesIO()
+        img.save(buffer, format=FORMATS[fmt], **({"optimize": True} if fmt == "png" else {}))
+        return buffer.getvalue()
+
+
+def thumbnail(path, size=100, fmt="png", cache_dir=CACHE_DIR):
+    """Thumbnail bytes, served from the disk cache when the file is unchanged"""
+    if not cache_dir:
+        return render_thumbnail(path, size, fmt)
+    cached = os.path.join(cache_dir, f"{cache_key(path, size, fmt)}.{fmt}")
+    try:
+        with open(cached, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    data = render_thumbnail(path, size, fmt)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write then rename, so a concurrent reader never sees half a file
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, cached)
+    return data
+
+
+def thumbnail_job(args):
+    """Pool entry point: (path, bytes or None, error or None)"""
+    path, size, fmt, cache_dir = args
+    try:
+        return path, thumbnail(path, size, fmt, cache_dir), None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+_pool = None
+
+
+def get_pool(workers=None):
+    """Process pool shared by batch calls, started on first use (see HeavyPool
+    for why workers come from a fork server)"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1),
+                                    mp_context=multiprocessing.get_context("forkserver"))
+    return _pool
+
+
+def thumbnail_batch(paths, size=100, fmt="png", cache_dir=CACHE_DIR, pool=None):
+    """[(path, bytes or None, error or None)] for every path, in order"""
+    pool = pool or get_pool()
+    jobs = [(path, size, fmt, cache_dir) for path in paths]
+    return list(pool.map(thumbnail_job, jobs, chunksize=max(1, len(jobs) // 16)))
@@ -0,0 +1,114 @@
+"""
+Tool discovery cache and precompiled argument validation.
+
+`ToolRegistry` is built once per server identity (serverInfo name and
+version from `initialize()`), so sessions to the same server reuse the tool
+list, the provider-neutral specs and one pydantic model per tool compiled
+from its JSON input schema. Looking a tool up is a dict access, and
+arguments are coerced ("5" -> 5, 5.0 -> 5, 125 -> "125" for a string) or
+rejected before they are sent over MCP.
+"""
+from typing import Any, Optional, Union
+
+from pydantic import ConfigDict, ValidationError, create_model
+
+_JSON_TYPES = {
+    "integer": int,
+    "number": float,
+    "string": str,
+    "boolean": bool,
+    "object": dict,
+    "null": type(None),
+}
+
+_registries = {}  # (server name, version) -> ToolRegistry
+
+
+class ToolArgumentError(ValueError):
+    """Arguments the model produced do not match the tool's input schema"""
+
+
+def _python_type(schema):
+    """Python annotation for a JSON schema fragment (the subset FastMCP emits)"""
+    if "anyOf" in schema:
+        return Union[tuple(_python_type(s) for s in schema["anyOf"])]
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        return Union[tuple(_python_type({"type": k}) for k in kind)]
+    if kind == "array":
+        return list[_python_type(schema["items"])] if "items" in schema else list
+    return _JSON_TYPES.get(kind, Any)
+
+
+def compile_model(tool):
+    """Pydantic model validating the arguments of one MCP tool"""
+    schema = tool.inputSchema or {}
+    required = set(schema.get("required", []))
+    fields = {}
+    for name, prop in schema.get("properties", {}).items():
+        annotation = _python_type(prop)
+        if name in required:
+            fields[name] = (annotation, ...)
+        else:
+            fields[name] = (Optional[annotation], prop.get("default"))
+    # Models often pass a computed number as text, e.g. add_text(text=125)
+    config = ConfigDict(extra="forbid", coerce_numbers_to_str=True)
+    return create_model(f"{tool.name}_args", __config__=config, **fields)
+
+
+class ToolRegistry:
+    """Tools of one server, indexed by name, with compiled argument models"""
+
+    def __init__(self, tools):
+        self.tools = list(tools)
+        self.by_name = {tool.name: tool for tool in self.tools}
+        self.models = {tool.name: compile_model(tool) for tool in self.tools}
+        # Built once, so LLM adapters that cache on the spec list keep hitting
+        self.specs = [
+            {"name": tool.name, "description": tool.description or "",
+             "parameters": tool.inputSchema}
+            for tool in self.tools
+        ]
+
+    def __len__(self):
+        return len(self.tools)
+
+    def __iter__(self):
+        return iter(self.tools)
+
+    def coerce(self, name, args):
+        """Validated arguments for `name`, or ToolArgumentError"""
+        model = self.models.get(name)
+        if model is None:
+            raise ToolArgumentError(f"Unknown tool {name!r}")
+        try:
+            validated = model.model_validate(args or {})
+        except ValidationError as e:
+            raise ToolArgumentError(
+                "; ".join(f"{'.'.join(map(str, err['loc'])) or name}: {err['msg']}"
+                          for err in e.errors())
+            ) from None
+        return validated.model_dump(exclude_unset=True)
+
+
+def server_key(session):
+    """(name, version) of the server behind `session`, if it was recorded"""
+    init = getattr(session, "init_result", None)
+    if init is None:
+        return None
+    return init.serverInfo.name, init.serverInfo.version
+
+
+async def discover_tools(session):
+    """Registry for the session's server, calling list_tools() only on a cache miss"""
+    key = server_key(session)
+    if key is not None and key in _registries:
+        return _registries[key]
+    registry = ToolRegistry((await session.list_tools()).tools)
+    if key is not None:
+        _registries[key] = registry
+    return registry
+
+
+def as_registry(tools):
+    return tools if isinstance(tools, ToolRegistry) else ToolRegistry(tools)
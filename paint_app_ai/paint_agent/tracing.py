@@ -0,0 +1,248 @@
+"""
+Lightweight tracing for the agent and the MCP server.
+
+A span is a timed, named block with attributes and a parent, recorded with
+`perf_counter_ns` and kept in memory until it is exported in batches:
+
+    with tracer.span("mcp.call_tool", tool="add"):
+        ...
+
+    tool = traced_tool(mcp)     # drop-in for @mcp.tool(), adds a tool.execute span
+
+Per-name latencies feed p50/p95/p99 summaries (`tracer.summary()`). Export
+is chosen with TRACE_EXPORT:
+
+    none    keep summaries only (default)
+    jsonl   append spans to TRACE_FILE (default traces-<pid>.jsonl)
+    otel    hand spans to the OpenTelemetry SDK, if it is installed
+
+Nothing is ever written to stdout, which belongs to the stdio transport.
+
+    python tracing.py traces-*.jsonl     # per-span percentiles from files
+"""
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import os
+import sys
+import time
+from collections import OrderedDict, defaultdict, deque
+
+_current = contextvars.ContextVar("current_span", default=None)
+_ids = itertools.count(1)
+_pid = os.getpid()
+
+
+class Span:
+    """A timed block; use through `Tracer.span` as a (sync) context manager"""
+    __slots__ = ("tracer", "name", "span_id", "parent", "parent_id", "root_id", "start_ns",
+                 "end_ns", "attrs", "error", "_token")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.error = None
+
+    # A class rather than @contextmanager: spans sit on hot paths, and the
+    # generator machinery would cost more than the span itself
+    def __enter__(self):
+        parent = _current.get()
+        self.span_id = next(_ids)
+        self.parent = parent
+        self.parent_id = parent.span_id if parent else None
+        self.root_id = parent.root_id if parent else self.span_id
+        self._token = _current.set(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.perf_counter_ns()
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish(self)
+        return False
+
+    @property
+    def duration_ms(self):
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self):
+        return {"trace": f"{_pid:x}-{self.root_id:x}", "id": self.span_id, "parent": self.parent_id,
+                "name": self.name, "ms": round(self.duration_ms, 3), "attrs": self.attrs,
+                "error": self.error}
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(q / 100 * len(sorted_values)))
+    return sorted_values[index]
+
+
+class JsonlExporter:
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, spans):
+        with open(self.path, "a") as f:
+            f.write("".join(json.dumps(span.to_dict()) + "\n" for span in spans))
+
+
+class OtelExporter:
+    """Replays finished spans into the OpenTelemetry API with their real timings
+
+    Spans finish children first, and a parent may only arrive in a later
+    batch, so a parent's OTel span is started (at its recorded start time)
+    when its first child is exported and ended when the parent itself is.
+    """
+
+    def __init__(self, service, keep=10_000):
+        from opentelemetry import trace  # optional dependency
+        self.trace = trace
+        self.tracer = trace.get_tracer(service)
+        # perf_counter has no epoch; anchor it to wall-clock time once
+        self.offset = time.time_ns() - time.perf_counter_ns()
+        self.keep = keep
+        self._open = {}            # span id -> started OTel span whose Span is still running
+        self._ended = OrderedDict()  # span id -> recently ended OTel span, for late children
+
+    def _otel_span(self, span):
+        otel_span = self._open.get(span.span_id) or self._ended.get(span.span_id)
+        if otel_span is None:
+            context = None
+            if span.parent is not None:
+                context = self.trace.set_span_in_context(self._otel_span(span.parent))
+            otel_span = self.tracer.start_span(span.name, context=context,
+                                               start_time=span.start_ns + self.offset)
+            self._open[span.span_id] = otel_span
+        return otel_span
+
+    def export(self, spans):
+        for span in spans:
+            otel_span = self._otel_span(span)
+            del self._open[span.span_id]
+            otel_span.set_attributes({k: str(v) for k, v in span.attrs.items()})
+            if span.error:
+                otel_span.set_attribute("error", span.error)
+            otel_span.end(end_time=span.end_ns + self.offset)
+            self._ended[span.span_id] = otel_span
+            if len(self._ended) > self.keep:
+                self._ended.popitem(last=False)
+
+
+class Tracer:
+    def __init__(self, exporter=None, batch_size=256, keep=10_000):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self._pending = []
+        self._latencies = defaultdict(lambda: deque(maxlen=keep))  # key -> recent ms
+        self._errors = defaultdict(int)
+
+    def span(self, name, **attrs):
+        return Span(self, name, attrs)
+
+    def _finish(self, span):
+        key = f"{span.name}[{span.attrs['tool']}]" if "tool" in span.attrs else span.name
+        self._latencies[key].append(span.duration_ms)
+        if span.error:
+            self._errors[key] += 1
+        if self.exporter is not None:
+            self._pending.append(span)
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        pending, self._pending = self._pending, []
+        if pending and self.exporter is not None:
+            try:
+                self.exporter.export(pending)
+            except Exception as e:
+                print(f"[tracing] export failed: {e}", file=sys.stderr)
+
+    def summary(self):
+        """{span key: {count, errors, p50, p95, p99, max}} in milliseconds"""
+        result = {}
+        for key, values in sorted(self._latencies.items()):
+            ordered = sorted(values)
+            result[key] = {"count": len(ordered), "errors": self._errors[key],
+                           "p50": percentile(ordered, 50), "p95": percentile(ordered, 95),
+                           "p99": percentile(ordered, 99), "max": ordered[-1]}
+        return result
+
+    def print_summary(self, file=sys.stderr):
+        print_table(self.summary(), file)
+
+
+def print_table(summary, file=sys.stderr):
+    print(f"{'span':<44}{'count':>7}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}",
+          file=file)
+    for key, s in summary.items():
+        print(f"{key:<44}{s['count']:>7}{s['errors']:>5}{s['p50']:>9.2f}{s['p95']:>9.2f}"
+              f"{s['p99']:>9.2f}", file=file)
+
+
+def from_env(service):
+    kind = os.getenv("TRACE_EXPORT", "none")
+    if kind == "jsonl":
+        return Tracer(JsonlExporter(os.getenv("TRACE_FILE", f"traces-{service}-{os.getpid()}.jsonl")))
+    if kind == "otel":
+        try:
+            return Tracer(OtelExporter(service))
+        except ImportError:
+            print("[tracing] opentelemetry is not installed; keeping summaries only",
+                  file=sys.stderr)
+    return Tracer()
+
+
+tracer = from_env(os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python")
+
+
+def traced_tool(mcp, tracer=tracer):
+    """Drop-in replacement for `mcp.tool`, wrapping each tool in a tool.execute span"""
+    def tool(*args, **kwargs):
+        register = mcp.tool(*args, **kwargs)
+
+        def decorator(fn):
+            name = kwargs.get("name") or fn.__name__
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def wrapper(*a, **kw):
+                    with tracer.span("tool.execute", tool=name):
+                        return await fn(*a, **kw)
+            else:
+                @functools.wraps(fn)
+                def wrapper(*a, **kw):
+                    with tracer.span("tool.execute", tool=name):
+                        return fn(*a, **kw)
+            return register(wrapper)
+
+        return decorator
+
+    return tool
+
+
+def summarise_files(paths):
+    latencies, errors = defaultdict(list), defaultdict(int)
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                span = json.loads(line)
+                key = (f"{span['name']}[{span['attrs']['tool']}]" if "tool" in span["attrs"]
+                       else span["name"])
+                latencies[key].append(span["ms"])
+                errors[key] += bool(span["error"])
+    summary = {}
+    for key, values in sorted(latencies.items()):
+        values.sort()
+        summary[key] = {"count": len(values), "errors": errors[key],
+                        "p50": percentile(values, 50), "p95": percentile(values, 95),
+                        "p99": percentile(values, 99), "max": values[-1]}
+    return summary
+
+
+if __name__ == "__main__":
+    print_table(summarise_files(sys.argv[1:]), sys.stdout)